@@ -0,0 +1,336 @@
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Complete SAT solver, using conflict driven clause learning, so that rsat.py can decide
+# exactly whether each set of clauses is satisfiable. Clauses are represented as in rsat.py:
+# [x1, not x5, x17] is [+1, -5, +17].
+
+from heapq import heappush, heappop, heapify
+
+# Internally, variable x(i+1) is numbered i, and its literals are 2*i (true) and 2*i+1 (false),
+# so the negation of literal l is l^1. Each literal has a value: True, False, or Unassigned.
+
+TRUE       = 1
+FALSE      = 0
+UNASSIGNED = -1
+
+# luby
+#
+# Luby sequence 1,1,2,1,1,2,4,1,1,2,... used to schedule restarts
+
+def luby(i):
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k-1)) - 1
+        k  = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k-1)
+
+# Solver
+#
+# Conflict driven clause learning, as in MiniSat:
+#     Unit propagation using two watched literals: the first two literals of each clause are watched,
+#         and a clause is only visited when one of them becomes false.
+#     When propagation finds a conflict, learn a clause from the first unique implication point,
+#         and backjump to the level at which it becomes unit.
+#     Branch on the unassigned variable with the highest activity (VSIDS), using the last value it had.
+#     Restart after a number of conflicts given by the Luby sequence.
+#     Periodically discard half the learned clauses, keeping those whose literals span few levels.
+
+class Solver:
+    def __init__(self,clauses,n,restart_unit=100,decay=0.95):
+        self.n            = n
+        self.values       = [UNASSIGNED] * (2*n)
+        self.level        = [0] * n
+        self.reason       = [None] * n
+        self.polarity     = [FALSE] * n
+        self.activity     = [0.0] * n
+        self.increment    = 1.0
+        self.decay        = decay
+        self.restart_unit = restart_unit
+        self.trail        = []
+        self.trail_limits = []
+        self.head         = 0
+        self.clauses      = []
+        self.learned      = []
+        self.lbd          = {}
+        self.watches      = [[] for _ in range(2*n)]
+        self.heap         = [(0.0,i) for i in range(n)]
+        self.seen         = [False] * n
+        self.consistent   = True
+        for clause in clauses:
+            self.add_clause(clause)
+
+    # add_clause
+    #
+    # Add one of the original clauses, removing repeated literals, and ignoring tautologies
+
+    def add_clause(self,clause):
+        literals = sorted(set(2*(abs(term)-1) + (term < 0) for term in clause))
+        if any(literals[j] ^ 1 == literals[j+1] for j in range(len(literals)-1)): return
+        if len(literals) == 0:
+            self.consistent = False
+        elif len(literals) == 1:
+            if self.values[literals[0]] == FALSE:
+                self.consistent = False
+            elif self.values[literals[0]] == UNASSIGNED:
+                self.assign(literals[0],None)
+        else:
+            self.attach(literals)
+
+    def attach(self,literals):
+        index = len(self.clauses)
+        self.clauses.append(literals)
+        self.watches[literals[0]].append(index)
+        self.watches[literals[1]].append(index)
+        return index
+
+    def assign(self,literal,reason):
+        variable                  = literal >> 1
+        self.values[literal]      = TRUE
+        self.values[literal ^ 1]  = FALSE
+        self.level[variable]      = len(self.trail_limits)
+        self.reason[variable]     = reason
+        self.trail.append(literal)
+
+    # propagate
+    #
+    # Assign literals that are forced by unit clauses, until there are no more, or there is a conflict
+    #
+    # Returns:
+    #     Index of a clause whose literals are all false, or None
+
+    def propagate(self):
+        values  = self.values
+        clauses = self.clauses
+        watches = self.watches
+        trail   = self.trail
+        while self.head < len(trail):
+            false_literal = trail[self.head] ^ 1
+            self.head    += 1
+            watching      = watches[false_literal]
+            kept          = []
+            watches[false_literal] = kept
+            for k,index in enumerate(watching):
+                clause = clauses[index]
+                if clause == None: continue                  # Discarded by reduce
+                if clause[0] == false_literal:
+                    clause[0],clause[1] = clause[1],false_literal
+                first = clause[0]
+                if values[first] == TRUE:
+                    kept.append(index)
+                    continue
+                for j in range(2,len(clause)):
+                    if values[clause[j]] != FALSE:
+                        clause[1],clause[j] = clause[j],false_literal
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if values[first] == FALSE:
+                        kept.extend(watching[k+1:])
+                        self.head = len(trail)
+                        return index
+                    self.assign(first,index)
+        return None
+
+    # analyze
+    #
+    # Derive a learned clause from a conflict, by resolving with the reasons for literals assigned at the current
+    # level, in reverse order, until only one such literal remains (the first unique implication point).
+    # Then drop any literal that is implied by the others.
+    #
+    # Returns:
+    #     learned clause, whose first literal is the one that becomes true after backjumping, and level for backjump
+
+    def analyze(self,conflict):
+        seen        = self.seen
+        level       = self.level
+        current     = len(self.trail_limits)
+        learned     = [None]
+        pending     = 0
+        literal     = None
+        position    = len(self.trail) - 1
+        clause      = self.clauses[conflict]
+        while True:
+            for q in (clause if literal == None else clause[1:]):
+                variable = q >> 1
+                if not seen[variable] and level[variable] > 0:
+                    seen[variable] = True
+                    self.bump(variable)
+                    if level[variable] >= current:
+                        pending += 1
+                    else:
+                        learned.append(q)
+            while not seen[self.trail[position] >> 1]:
+                position -= 1
+            literal   = self.trail[position]
+            position -= 1
+            variable  = literal >> 1
+            seen[variable] = False
+            pending  -= 1
+            if pending == 0: break
+            clause = self.clauses[self.reason[variable]]
+        learned[0] = literal ^ 1
+        # Remove literals whose reasons consist only of other literals in the clause
+        minimized = learned[:1]
+        for q in learned[1:]:
+            reason = self.reason[q >> 1]
+            if reason == None or any(not seen[x >> 1] and level[x >> 1] > 0 for x in self.clauses[reason][1:]):
+                minimized.append(q)
+        for q in learned[1:]:
+            seen[q >> 1] = False
+        learned = minimized
+        backjump = 0
+        if len(learned) > 1:
+            j = max(range(1,len(learned)),key=lambda j:level[learned[j] >> 1])
+            learned[1],learned[j] = learned[j],learned[1]
+            backjump = level[learned[1] >> 1]
+        return learned,backjump
+
+    # bump
+    #
+    # Increase activity of a variable involved in a conflict. Rather than decaying all activities,
+    # the increment grows after each conflict; when activities get too large, all are scaled down.
+
+    def bump(self,variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.heap = [(-self.activity[i],i) for i in range(self.n) if self.values[2*i] == UNASSIGNED]
+            heapify(self.heap)
+        elif self.values[2*variable] == UNASSIGNED:
+            heappush(self.heap,(-self.activity[variable],variable))
+
+    def backjump(self,target):
+        if len(self.trail_limits) <= target: return
+        start = self.trail_limits[target]
+        for literal in self.trail[start:]:
+            variable = literal >> 1
+            self.values[literal] = self.values[literal ^ 1] = UNASSIGNED
+            self.polarity[variable] = literal & 1
+            self.reason[variable] = None
+            heappush(self.heap,(-self.activity[variable],variable))
+        del self.trail[start:]
+        del self.trail_limits[target:]
+        self.head = start
+
+    # decide
+    #
+    # Find unassigned variable with highest activity. The heap may contain several entries for a variable,
+    # and entries for variables that have been assigned, so those are skipped.
+    #
+    # Returns:
+    #     literal, or None if all variables assigned
+
+    def decide(self):
+        while len(self.heap) > 0:
+            activity,variable = heappop(self.heap)
+            if self.values[2*variable] == UNASSIGNED and -activity == self.activity[variable]:
+                return 2*variable + self.polarity[variable]
+        return None
+
+    # reduce
+    #
+    # Discard the learned clauses that span the most levels, except those that are reasons for current assignments.
+    # Discarded clauses are set to None, and removed from the watch lists when propagate encounters them.
+
+    def reduce(self):
+        def is_locked(index):
+            first = self.clauses[index][0]
+            return self.values[first] == TRUE and self.reason[first >> 1] == index
+
+        self.learned.sort(key=lambda index:self.lbd[index])
+        keep = len(self.learned) // 2
+        kept = []
+        for rank,index in enumerate(self.learned):
+            if rank < keep or self.lbd[index] <= 2 or is_locked(index):
+                kept.append(index)
+            else:
+                self.clauses[index] = None
+                del self.lbd[index]
+        self.learned = kept
+
+    # solve
+    #
+    # Parameters:
+    #     max_conflicts   Give up after this many conflicts; if None, continue until solved
+    #
+    # Returns:
+    #     True if satisfiable, False if not, or None if max_conflicts reached
+
+    def solve(self,max_conflicts=None):
+        if not self.consistent or self.propagate() != None:
+            return False
+        self.conflicts = 0
+        restarts      = 1
+        next_restart  = self.restart_unit * luby(restarts)
+        since_restart = 0
+        max_learned   = max(len(self.clauses) // 3,1000)
+        while True:
+            conflict = self.propagate()
+            if conflict != None:
+                self.conflicts += 1
+                since_restart  += 1
+                if len(self.trail_limits) == 0: return False
+                learned,level = self.analyze(conflict)
+                self.backjump(level)
+                if len(learned) == 1:
+                    self.assign(learned[0],None)
+                else:
+                    index = self.attach(learned)
+                    self.learned.append(index)
+                    self.lbd[index] = len(set(self.level[literal >> 1] for literal in learned))
+                    self.assign(learned[0],index)
+                self.increment /= self.decay
+                if max_conflicts != None and self.conflicts >= max_conflicts: return None
+            else:
+                if since_restart >= next_restart:
+                    self.backjump(0)
+                    restarts     += 1
+                    next_restart  = self.restart_unit * luby(restarts)
+                    since_restart = 0
+                if len(self.learned) - len(self.trail) >= max_learned:
+                    self.reduce()
+                    max_learned = int(max_learned * 1.1)
+                literal = self.decide()
+                if literal == None: return True
+                self.trail_limits.append(len(self.trail))
+                self.assign(literal,None)
+
+    # get_model
+    #
+    # Returns:
+    #     Values of variables after a successful solve, +1 (True) or -1 (False), as an environment in rsat.py
+
+    def get_model(self):
+        return [1 if self.values[2*i] == TRUE else -1 for i in range(self.n)]
+
+# solve
+#
+# Decide whether a set of clauses can be satisfied, with the same interface as rsat.solve. M is not
+# needed, since the search is complete, and is present only for compatibility.
+
+def solve(clauses,M=100,n=100):
+    return Solver(clauses,n).solve() == True
@@ -1,49 +1,127 @@
 # Calculate maximal independent set
 
+import numpy as np
+
 def mis(T):
-    # initialize dictionaries and stack
-    
-    unprocessed = []
-    score       = {}
-    weights     = {}
-    children    = {}
-    def build_tree(T):
-        if len(T)==0:
-            return None
-        else:
-            node            = len(weights)
-            weights[node]   = T[0]
-            children [node] = []
-            unprocessed.append(node)
-            for rest in T[1:]:
-                nn = build_tree(rest)
-                if nn != None:
-                    children [node].append(nn)
-            return node
-    build_tree(T)
- 
-    # Calculate maximal independent set
- 
-    while len(unprocessed)>0:
-        node        = unprocessed.pop()
-        score[node] =\
-            weights[node] if len(children[node])==0\
-            else max(sum([score[child] for child in children[node]]),
-                     weights[node]+sum([
-                         score[grandchild]
-                         for child in children[node]
-                         for grandchild in children[child]]))
-    return score[0]
-
-if __name__=='__main__': 
-    T = [3,
-         [4,
-          [1],
-          [2]],
-         [1,
-          [2]],
-         [5,
-          [1],
-          [1]]] 
-    
-    print (f'Score for maximal independent set = {mis(T)}')
\ No newline at end of file
+    score,_ = solve(*to_arrays(T))
+    return score
+
+# Convert a tree given as nested lists, [weight, subtree, subtree, ...], to a parent array
+# and a weight array, numbering nodes in preorder. The root's parent is -1.
+
+def to_arrays(T):
+    parent  = []
+    weights = []
+    stack   = [(T,-1)]
+    while len(stack)>0:
+        subtree,p = stack.pop()
+        if len(subtree)==0: continue
+        node = len(weights)
+        weights.append(subtree[0])
+        parent.append(p)
+        stack.extend((child,node) for child in reversed(subtree[1:]))
+    return np.array(parent,dtype=np.int64),np.array(weights)
+
+# Distance of each node from its root, by pointer jumping: after round k, ancestor is 2**k
+# generations up (or -1), and depth is the distance to it, so there are log(height) rounds.
+
+def get_depths(parent):
+    depth    = (parent>=0).astype(np.int64)
+    ancestor = parent.copy()
+    active   = np.flatnonzero(ancestor>=0)
+    while len(active)>0:
+        depth[active]   += depth[ancestor[active]]
+        ancestor[active] = ancestor[ancestor[active]]
+        active           = active[ancestor[active]>=0]
+    return depth
+
+# Calculate maximum weight independent set of a tree (or forest)
+#
+# Parameters:
+#     parent    parent[i] is parent of node i, or -1 for a root
+#     weights   weight of each node
+#
+# Returns:
+#     score     Total weight of set
+#     selected  Boolean array showing which nodes are in set
+#
+# Each node has two scores: included, the best for its subtree if it is in the set, and
+# excluded, if it is not. Nodes are processed from the deepest level up, each level adding its
+# scores to its parents, so there is no recursion and no list of children. A shallow tree is processed
+# one level at a time using numpy; a deep one, where most levels are small, one node at a time, reading
+# and writing the arrays in place through memoryviews rather than copying them to lists. The deep case is
+# limited by the Python loop: a tree from create_tree(10**7,depth=3) takes about 20 s and 0.7 GB,
+# compared with about 6 s for a random tree of the same size.
+
+def solve(parent,weights,min_level_size=64):
+    n        = len(parent)
+    depth    = get_depths(parent)
+    order    = np.argsort(depth,kind='stable')
+    bounds   = np.searchsorted(depth[order],np.arange(depth.max()+2))
+    included = np.array(weights)
+    excluded = np.zeros(n,dtype=included.dtype)
+    selected = np.zeros(n,dtype=bool)
+    if n >= min_level_size * len(bounds):
+        levels = [order[bounds[d]:bounds[d+1]] for d in range(len(bounds)-1)]
+        for level in reversed(levels[1:]):
+            np.add.at(included,parent[level],excluded[level])
+            np.add.at(excluded,parent[level],np.maximum(included[level],excluded[level]))
+        selected[levels[0]] = included[levels[0]] > excluded[levels[0]]
+        for level in levels[1:]:
+            selected[level] = ~selected[parent[level]] & (included[level] > excluded[level])
+    else:
+        included = included.astype(np.float64 if included.dtype.kind=='f' else np.int64)
+        excluded = excluded.astype(included.dtype)
+        p        = memoryview(parent.astype(np.int64,copy=False))
+        inc      = memoryview(included)
+        exc      = memoryview(excluded)
+        sel      = memoryview(selected)
+        top_down = memoryview(order)
+        for v in reversed(top_down):
+            u = p[v]
+            if u >= 0:
+                e = exc[v]
+                i = inc[v]
+                inc[u] += e
+                exc[u] += i if i > e else e
+        for v in top_down:
+            u = p[v]
+            sel[v] = (u < 0 or not sel[u]) and inc[v] > exc[v]
+    roots = order[:bounds[1]]
+    return np.maximum(included[roots],excluded[roots]).sum(),selected
+
+# Generate a random tree with n nodes: each node's parent is chosen from the nodes before it,
+# or, if depth is specified, from the preceding depth nodes, giving a deep tree.
+
+def create_tree(n,depth=None,rng=None):
+    rng    = np.random.default_rng() if rng==None else rng
+    i      = np.arange(1,n)
+    lower  = 0 if depth==None else np.maximum(i - depth,0)
+    parent = np.concatenate([[-1],lower + (rng.random(n-1) * (i - lower)).astype(np.int64)])
+    return parent,rng.integers(1,100,size=n)
+
+if __name__=='__main__':
+    from argparse import ArgumentParser
+    from time import time
+    parser = ArgumentParser('Maximum weight independent set of a tree')
+    parser.add_argument('--n', default=None,type=int, help = 'Solve a random tree with this many nodes')
+    parser.add_argument('--depth', default=None,type=int, help = 'Choose parents from this many preceding nodes, giving a deep tree')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    args = parser.parse_args()
+    if args.n==None:
+        T = [3,
+             [4,
+              [1],
+              [2]],
+             [1,
+              [2]],
+             [5,
+              [1],
+              [1]]]
+
+        print (f'Score for maximal independent set = {mis(T)}')
+    else:
+        start           = time()
+        parent,weights  = create_tree(args.n,depth=args.depth,rng=np.random.default_rng(args.seed))
+        score,selected  = solve(parent,weights)
+        print (f'Score for maximal independent set = {score}, {selected.sum()} nodes, {time()-start:.2f} s')
@@ -0,0 +1,291 @@
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Maximum weight independent set of a general graph. Eliminate vertices one by one to obtain a
+# tree decomposition, then solve exactly by dynamic programming over its bags, as mis.py does for trees.
+# If the decomposition is too wide, use branch and bound instead.
+
+from heapq import heappush, heappop
+import numpy as np
+
+# create_adjacency
+#
+# Convert a list of edges to sets of neighbours
+#
+# Parameters:
+#     n       Number of vertices, numbered 0,1,...,n-1
+#     edges   List of pairs (u,v); loops and repeated edges are ignored
+
+def create_adjacency(n,edges):
+    adjacency = [set() for _ in range(n)]
+    for u,v in edges:
+        if u != v:
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+    return adjacency
+
+# get_degree
+#
+# Score for min-degree heuristic: number of neighbours that have not been eliminated
+
+def get_degree(adjacency,v):
+    return len(adjacency[v])
+
+# get_fill
+#
+# Score for min-fill heuristic: number of edges that would be added if v were eliminated
+
+def get_fill(adjacency,v):
+    neighbours = list(adjacency[v])
+    return sum(len(neighbours) - 1 - len(adjacency[u] & adjacency[v]) for u in neighbours) // 2
+
+Orderings = {
+    'min-degree' : get_degree,
+    'min-fill'   : get_fill
+}
+
+# get_elimination_order
+#
+# Eliminate vertices one at a time, choosing the one with the lowest score, and making its remaining neighbours
+# into a clique. Scores are kept in a heap; when a vertex is eliminated, the only scores that can change are those of
+# its neighbours, and of vertices adjacent to both ends of a new edge, so only those are recalculated, and stale
+# entries are skipped when they are popped.
+#
+# Parameters:
+#     n          Number of vertices
+#     edges      List of pairs (u,v)
+#     ordering   Key for Orderings
+#
+# Returns:
+#     order        Vertices in the order they were eliminated
+#     separators   For each vertex, its neighbours (including fill edges) that were eliminated after it
+
+def get_elimination_order(n,edges,ordering='min-degree'):
+    get_score  = Orderings[ordering]
+    adjacency  = create_adjacency(n,edges)
+    scores     = [get_score(adjacency,v) for v in range(n)]
+    heap       = [(score,v) for v,score in enumerate(scores)]
+    heap.sort()
+    eliminated = [False] * n
+    order      = []
+    separators = [None] * n
+    while len(heap) > 0:
+        score,v = heappop(heap)
+        if eliminated[v] or score != scores[v]: continue
+        eliminated[v] = True
+        order.append(v)
+        neighbours    = adjacency[v]
+        separators[v] = sorted(neighbours)
+        affected      = set(neighbours)
+        for u in neighbours:
+            adjacency[u].discard(v)
+        for u in neighbours:
+            for w in neighbours - adjacency[u] - {u}:
+                affected |= adjacency[u] & adjacency[w]
+            adjacency[u] |= neighbours - {u}
+        for u in affected:
+            scores[u] = get_score(adjacency,u)
+            heappush(heap,(scores[u],u))
+        adjacency[v] = set()
+    return order,separators
+
+# get_width
+#
+# Width of tree decomposition whose bags are each vertex together with its separator
+
+def get_width(separators):
+    return max((len(separator) for separator in separators),default=0)
+
+# solve_decomposition
+#
+# Dynamic programming over bags. The bag for v is v followed by its separator, and the table for v, indexed by
+# the states (in or out of the set) of the vertices in its separator, as a bitmask, is the best weight for v and
+# all vertices whose bags are below it. Each separator is contained in the bag of the first of its vertices to be
+# eliminated, which is the parent bag, so a bag's table is calculated, for all states of the bag at once, from its
+# children's tables, by picking out the bits for each child's separator.
+#
+# Parameters:
+#     n            Number of vertices
+#     edges        List of pairs (u,v)
+#     weights      Weight of each vertex
+#     order        Elimination order
+#     separators   Separators, from get_elimination_order
+#
+# Returns:
+#     Total weight, and list of vertices in set
+
+def solve_decomposition(n,edges,weights,order,separators):
+    adjacency = create_adjacency(n,edges)
+    position  = np.empty(n,dtype=int)
+    position[order] = np.arange(n)
+    children  = [[] for _ in range(n)]
+    for v in order:
+        if len(separators[v]) > 0:
+            children[min(separators[v],key=lambda u:position[u])].append(v)
+
+    tables    = [None] * n
+    choices   = [None] * n
+    for v in order:
+        bag    = [v] + separators[v]
+        index  = {u:i for i,u in enumerate(bag)}
+        states = np.arange(2**len(bag))
+        values = np.where(states & 1,weights[v],0).astype(float)
+        for c in children[v]:
+            picked = np.zeros_like(states)
+            for j,u in enumerate(separators[c]):
+                picked |= ((states >> index[u]) & 1) << j
+            values += tables[c][picked]
+            tables[c] = None
+        conflicts = sum(1 << index[u] for u in separators[v] if u in adjacency[v])
+        values[(states & 1).astype(bool) & (states & conflicts != 0)] = -np.inf
+        values = values.reshape(-1,2)
+        choices[v] = np.argmax(values,axis=1).astype(np.uint8)
+        tables[v] = values.max(axis=1)
+
+    in_set = np.zeros(n,dtype=bool)
+    for v in reversed(order):
+        state = sum(int(in_set[u]) << j for j,u in enumerate(separators[v]))
+        in_set[v] = choices[v][state] == 1
+    selected = np.flatnonzero(in_set).tolist()
+    return sum(weights[v] for v in selected),selected
+
+# solve_branch_and_bound
+#
+# Branch on the candidate of largest degree: either it is in the set, so its neighbours are not, or it is not.
+# Sets of vertices are Python ints used as bitsets. The bound is from a greedy clique cover of the candidates:
+# at most one vertex in each clique can be in the set, so the total of the largest weight in each clique is an upper bound.
+#
+# Parameters:
+#     n         Number of vertices
+#     edges     List of pairs (u,v)
+#     weights   Weight of each vertex
+#
+# Returns:
+#     Total weight, and list of vertices in set
+
+def solve_branch_and_bound(n,edges,weights):
+    adjacency  = create_adjacency(n,edges)
+    neighbours = [sum(1 << u for u in adjacency[v]) for v in range(n)]
+    by_weight  = sorted(range(n),key=lambda v:-weights[v])
+    best       = -1
+    best_set   = 0
+
+    def get_bound(candidates):
+        bound = 0
+        for v in by_weight:
+            if candidates >> v & 1:
+                bound += weights[v]
+                clique = 1 << v
+                extension = candidates & neighbours[v]
+                while extension:
+                    u = extension.bit_length() - 1
+                    clique |= 1 << u
+                    extension &= neighbours[u]
+                candidates &= ~clique
+                if not candidates: break
+        return bound
+
+    stack = [((1 << n) - 1,0,0)]
+    while len(stack) > 0:
+        candidates,chosen,total = stack.pop()
+        # Candidates with no neighbours among the candidates can be added at once
+        isolated = 0
+        m = candidates
+        while m:
+            v = (m & -m).bit_length() - 1
+            m &= m - 1
+            if not candidates & neighbours[v]:
+                isolated |= 1 << v
+                total += weights[v]
+        candidates &= ~isolated
+        chosen |= isolated
+        if total > best:
+            best,best_set = total,chosen
+        if not candidates or total + get_bound(candidates) <= best: continue
+        v = max((u for u in range(candidates.bit_length()) if candidates >> u & 1),
+                key=lambda u:(bin(candidates & neighbours[u]).count('1'),weights[u]))
+        stack.append((candidates & ~(1 << v),chosen,total))
+        stack.append((candidates & ~neighbours[v] & ~(1 << v),chosen | (1 << v),total + weights[v]))
+
+    return best,[v for v in range(n) if best_set >> v & 1]
+
+# solve
+#
+# Find maximum weight independent set, using tree decomposition if its width is no more than max_width,
+# otherwise using branch and bound.
+#
+# Returns:
+#     Total weight, list of vertices in set, and width of decomposition
+
+def solve(n,edges,weights=None,ordering='min-degree',max_width=20):
+    weights = [1] * n if weights is None else weights
+    order,separators = get_elimination_order(n,edges,ordering=ordering)
+    width = get_width(separators)
+    total,selected = (solve_decomposition(n,edges,weights,order,separators) if width <= max_width
+                      else solve_branch_and_bound(n,edges,weights))
+    return total,selected,width
+
+# read_edges
+#
+# Read a file containing one edge, as a pair of vertex numbers, on each line. Lines starting with # are ignored.
+
+def read_edges(file_name):
+    with open(file_name) as f:
+        edges = [tuple(int(x) for x in line.split()[:2]) for line in f if line.strip() and not line.startswith('#')]
+    return 1 + max((max(u,v) for u,v in edges),default=-1),edges
+
+# create_graph
+#
+# Random partial k-tree: start with a clique of k+1 vertices, then join each new vertex to a randomly chosen
+# k-clique, keeping each edge with probability p. The treewidth is at most k.
+
+def create_graph(n,k=3,p=0.5,rng=None):
+    rng     = np.random.default_rng() if rng == None else rng
+    cliques = [list(range(k+1))]
+    edges   = [(u,v) for u in range(k+1) for v in range(u)]
+    for v in range(k+1,n):
+        clique  = cliques[rng.integers(len(cliques))]
+        dropped = clique[rng.integers(len(clique))]
+        base    = [u for u in clique if u != dropped]
+        edges.extend((u,v) for u in base)
+        cliques.append(base + [v])
+    return [edge for edge in edges if rng.random() < p]
+
+if __name__=='__main__':
+    from argparse import ArgumentParser
+    from time import time
+    parser = ArgumentParser('Maximum weight independent set of a general graph')
+    parser.add_argument('--edges', default=None, help = 'File containing edges; if omitted, generate a random partial k-tree')
+    parser.add_argument('--n', default=1000,type=int, help = 'Number of vertices for random graph')
+    parser.add_argument('--k', default=3,type=int, help = 'Treewidth of random graph')
+    parser.add_argument('--p', default=0.5,type=float, help = 'Probability of keeping each edge of random graph')
+    parser.add_argument('--ordering', default='min-degree', choices=Orderings.keys(), help = 'Heuristic for elimination order')
+    parser.add_argument('--max_width', default=20,type=int, help = 'Use branch and bound if decomposition is wider than this')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    args = parser.parse_args()
+    start = time()
+    rng   = np.random.default_rng(args.seed)
+    if args.edges == None:
+        n,edges = args.n,create_graph(args.n,k=args.k,p=args.p,rng=rng)
+    else:
+        n,edges = read_edges(args.edges)
+    weights = rng.integers(1,100,size=n).tolist()
+    total,selected,width = solve(n,edges,weights,ordering=args.ordering,max_width=args.max_width)
+    print (f'{n} vertices, {len(edges)} edges, width {width}: weight {total}, {len(selected)} vertices in set, {time()-start:.2f} s')
@@ -19,6 +19,8 @@
 # SOFTWARE.
 
 import random
+import numpy as np
+import cdcl
 
 # create_environment
 #
@@ -90,6 +92,44 @@ def evaluate(clauses=[],environment=[]):
             return False
     return True
 
+# to_array
+#
+# Convert clauses to an (m,k) array of terms, so x1, not x5, x17 is still [+1, -5, +17]
+#
+# Parameters:
+#     clauses   List of clauses, each with k terms
+
+def to_array(clauses):
+    if len(clauses) == 0:
+        return np.zeros((0,1),dtype=np.int64)
+    return np.array(clauses,dtype=np.int64).reshape(len(clauses),-1)
+
+# create_environments
+#
+# Create M sets of variables, as an (M,n) array of +1 and -1. The numpy generator is seeded from random,
+# so --seed still makes runs reproducible.
+
+def create_environments(M=100,n=100):
+    rng = np.random.default_rng(random.getrandbits(64))
+    return rng.choice(np.array([-1,1],dtype=np.int8),size=(M,n))
+
+# evaluate_block
+#
+# Evaluate a set of clauses in many environments at once
+#
+# Parameters:
+#     clauses        (m,k) array of terms
+#     environments   (M,n) array of variables, +1 or -1
+#
+# Returns:
+#     Array of M booleans, True iff all clauses satisfied in corresponding environment.
+#     A term is satisfied if it has the same sign as its variable, a clause if any term is,
+#     and the set of clauses if all clauses are.
+
+def evaluate_block(clauses,environments):
+    terms = environments[:,np.abs(clauses)-1] * np.sign(clauses).astype(np.int8)
+    return np.all(np.any(terms > 0,axis=2),axis=1)
+
 # solve
 #
 # Try to satisfy a set of clauses
@@ -102,10 +142,195 @@ def evaluate(clauses=[],environment=[]):
 #      True iff the clauses are satisfied for at least one assignment of values
 
 def solve(clauses,M=100,n=100):
-    for i in range(M):
-        if evaluate(clauses=clauses,environment=create_environment(n=n)):
-            return True
-    return False    
+    return bool(np.any(evaluate_block(to_array(clauses),create_environments(M=M,n=n))))
+
+# create_words
+#
+# Create 64*W sets of variables, packed into bits: bit j of words[i,w] is 1 if
+# variable i+1 is True in set 64*w+j, and 0 if it is False.
+#
+# Returns:
+#     (n,W) array of uint64
+
+def create_words(W=2,n=100):
+    rng = np.random.default_rng(random.getrandbits(64))
+    return rng.integers(0,2**64,size=(n,W),dtype=np.uint64,endpoint=False)
+
+# evaluate_bits
+#
+# Evaluate a set of clauses in 64*W environments, using one bit for each variable in each environment.
+# A negated term is the complement of its variable's word, a clause is the OR of its terms, and
+# the set of clauses is the AND of the clauses. Clauses are processed a batch at a time, stopping
+# as soon as no environment satisfies all clauses seen so far.
+#
+# Parameters:
+#     clauses    (m,k) array of terms
+#     words      (n,W) array from create_words
+#     batch      Number of clauses to process at once
+#
+# Returns:
+#     Array of W words: bit j of word w is 1 iff all clauses are satisfied in environment 64*w+j
+
+def evaluate_bits(clauses,words,batch=1024):
+    variables = np.abs(clauses) - 1
+    negations = np.where(clauses < 0,np.uint64(2**64-1),np.uint64(0))
+    result    = np.full(words.shape[1],2**64-1,dtype=np.uint64)
+    for start in range(0,len(clauses),batch):
+        terms   = words[variables[start:start+batch]] ^ negations[start:start+batch,:,None]
+        result &= np.bitwise_and.reduce(np.bitwise_or.reduce(terms,axis=1),axis=0)
+        if not result.any(): break
+    return result
+
+# solve_bits
+#
+# Try to satisfy a set of clauses, as solve does, but evaluating 64 assignments in each word,
+# so M is rounded up to a multiple of 64
+
+def solve_bits(clauses,M=100,n=100):
+    return bool(evaluate_bits(to_array(clauses),create_words(W=(M + 63) // 64,n=n)).any())
+
+# LocalSearch
+#
+# State for local search: the number of true terms in each clause, the list of clauses that are not satisfied,
+# and, for each variable, its break count: the number of clauses that it alone satisfies, which would become
+# unsatisfied if it were flipped. For a clause with exactly one true term, that term's variable is the XOR of the
+# variables of its true terms, which is maintained as terms become true or false. Flipping a variable therefore
+# updates the state in time proportional to the number of clauses in which it occurs.
+# Variables are numbered from 0 here, and the terms of each clause must refer to distinct variables.
+
+class LocalSearch:
+    def __init__(self,clauses,n):
+        self.n           = n
+        self.variables   = [[abs(term)-1 for term in clause] for clause in clauses]
+        # occurrences[2*i] lists clauses containing x(i+1), occurrences[2*i+1] those containing not x(i+1)
+        self.occurrences = [[] for _ in range(2*n)]
+        for c,clause in enumerate(clauses):
+            for term in clause:
+                self.occurrences[2*(abs(term)-1) + (term < 0)].append(c)
+
+    # initialize
+    #
+    # Start from a random assignment
+
+    def initialize(self):
+        n               = self.n
+        m               = len(self.variables)
+        self.assignment = [random.random() < 0.5 for _ in range(n)]
+        self.true_count = [0] * m
+        self.critical   = [0] * m
+        self.breaks     = [0] * n
+        for i in range(n):
+            for c in self.occurrences[2*i + (not self.assignment[i])]:
+                self.true_count[c] += 1
+                self.critical[c]   ^= i
+        self.unsatisfied = [c for c in range(m) if self.true_count[c] == 0]
+        self.position    = [-1] * m
+        for j,c in enumerate(self.unsatisfied):
+            self.position[c] = j
+        for c in range(m):
+            if self.true_count[c] == 1:
+                self.breaks[self.critical[c]] += 1
+
+    # flip
+    #
+    # Flip variable i, visiting only the clauses in which it occurs
+
+    def flip(self,i):
+        value              = self.assignment[i]
+        self.assignment[i] = not value
+        true_count         = self.true_count
+        critical           = self.critical
+        breaks             = self.breaks
+        for c in self.occurrences[2*i + value]:       # terms becoming true
+            count = true_count[c]
+            if count == 0:
+                self.remove(c)
+                breaks[i] += 1
+            elif count == 1:
+                breaks[critical[c]] -= 1
+            true_count[c] = count + 1
+            critical[c]  ^= i
+        for c in self.occurrences[2*i + (not value)]: # terms becoming false
+            count         = true_count[c] - 1
+            true_count[c] = count
+            critical[c]  ^= i
+            if count == 0:
+                self.add(c)
+                breaks[i] -= 1
+            elif count == 1:
+                breaks[critical[c]] += 1
+
+    def add(self,c):
+        self.position[c] = len(self.unsatisfied)
+        self.unsatisfied.append(c)
+
+    def remove(self,c):
+        j    = self.position[c]
+        last = self.unsatisfied.pop()
+        if last != c:
+            self.unsatisfied[j] = last
+            self.position[last] = j
+        self.position[c] = -1
+
+    # walksat
+    #
+    # Pick an unsatisfied clause, and flip a variable that breaks no clauses if there is one; otherwise,
+    # with probability p, flip a random variable from the clause, or else one with the fewest breaks.
+    #
+    # Returns:
+    #     True iff all clauses satisfied within max_flips flips
+
+    def walksat(self,max_flips,p=0.57):
+        self.initialize()
+        for _ in range(max_flips):
+            if len(self.unsatisfied) == 0: return True
+            variables = self.variables[self.unsatisfied[random.randrange(len(self.unsatisfied))]]
+            breaks    = [self.breaks[i] for i in variables]
+            fewest    = min(breaks)
+            if fewest > 0 and random.random() < p:
+                self.flip(random.choice(variables))
+            else:
+                self.flip(random.choice([i for i,b in zip(variables,breaks) if b == fewest]))
+        return len(self.unsatisfied) == 0
+
+    # schoening
+    #
+    # Flip a random variable from an unsatisfied clause, starting again from a new random assignment
+    # after every 3n flips (Schoening)
+
+    def schoening(self,max_flips):
+        flips = 0
+        while flips < max_flips:
+            self.initialize()
+            for _ in range(min(3*self.n,max_flips - flips)):
+                if len(self.unsatisfied) == 0: return True
+                self.flip(random.choice(self.variables[self.unsatisfied[random.randrange(len(self.unsatisfied))]]))
+                flips += 1
+            if len(self.unsatisfied) == 0: return True
+        return False
+
+# solve_walksat
+#
+# Try to satisfy a set of clauses using WalkSAT. To do an amount of work comparable with M attempts
+# by the other solvers, it is allowed up to M*n flips.
+
+def solve_walksat(clauses,M=100,n=100):
+    return LocalSearch(clauses,n).walksat(max_flips=M*n)
+
+# solve_schoening
+#
+# Try to satisfy a set of clauses using Schoening's random walk, with up to M*n flips in total
+
+def solve_schoening(clauses,M=100,n=100):
+    return LocalSearch(clauses,n).schoening(max_flips=M*n)
+
+Solvers = {
+    'sample'    : solve,
+    'bits'      : solve_bits,
+    'walksat'   : solve_walksat,
+    'schoening' : solve_schoening,
+    'cdcl'      : cdcl.solve
+}
 
 # coerce_list
 #
@@ -122,16 +347,17 @@ def coerce_list(x):
 #     k   Number of terms in each clause: default to 3-SAT
 #     n   Number of variables
 #     M   Number of attempts to solve for each set
-#     N   Number of sets of clauses to solve for
+#     N        Number of sets of clauses to solve for
+#     solver   Key for Solvers
 #
 # Returns: fraction of clauses that can be solved. Generate N sets of clauses, 
 #          and make up to M attempts to solve, with a new set of variables each time.
 
-def estimate_solvability(m=10,k=3,n=100,M=100,N=25):
+def estimate_solvability(m=10,k=3,n=100,M=100,N=25,solver='sample'):
     return sum(
-        [solve(clauses=create_clauses(m = m, k = k, n = n),
-               M = M,
-               n = n)
+        [Solvers[solver](clauses=create_clauses(m = m, k = k, n = n),
+                         M = M,
+                         n = n)
          for i in range(N)]
         )/N
 
@@ -144,16 +370,18 @@ if __name__=='__main__':
     parser = argparse.ArgumentParser('Investigate dependence of satisfiability on alpha')
     parser.add_argument('--seed',   type=int,                             help='Seed for random number generator')
     parser.add_argument('--dalpha', type=float,            default=0.01,  help='Stepsize for iterating alpha')
+    parser.add_argument('--alpha',  type=float,            default=1.0,   help='Upper limit for alpha')
     parser.add_argument('--k',      type=int,              default=3,     help='Number of terms in each clause: default to 3-SAT')
     parser.add_argument('--N',      type=int,              default=100,   help='Number of sets of clauses to solve for')
     parser.add_argument('--M',      type=int,              default=100,   help='Number of attempts to solve for each set')
     parser.add_argument('--n',      type=int,  nargs='*',  default=100,   help='Number of variables')
+    parser.add_argument('--solver', choices=Solvers.keys(), default='sample', help='Method used to solve each set of clauses')
     parser.add_argument('--show', action='store_true',     default=False, help='Show plot')
     args = parser.parse_args();
     
     random.seed(args.seed) # Uses system time if no seed specified through command line
     
-    alphas = [args.dalpha*i for i in range(int(1.0/args.dalpha))]
+    alphas = [args.dalpha*i for i in range(int(args.alpha/args.dalpha))]
     
     for n in coerce_list(args.n):
         plt.plot(alphas, 
@@ -161,7 +389,8 @@ if __name__=='__main__':
                                        k = args.k,
                                        n = n,
                                        M = args.M,
-                                       N = args.N) for alpha in alphas],
+                                       N = args.N,
+                                       solver = args.solver) for alpha in alphas],
                  label=f'{n}')
      
     plt.title(f'{args.k}-SAT: N={args.N}, M={args.M}')
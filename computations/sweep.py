@@ -0,0 +1,174 @@
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Sweep over alpha and n for rsat.py, solving each set of clauses as a separate task in a pool of processes.
+# Each result is appended to a CSV file as soon as it is available, so an interrupted sweep can be restarted,
+# skipping the tasks that have already been done; the plot is generated from the CSV file.
+
+import csv, os, random
+from multiprocessing import Pool
+from time import time
+import numpy as np
+from rsat import Solvers, create_clauses
+
+Fields = ['alpha','n','m','instance','k','M','solver','seed','satisfied','seconds']
+
+# get_alpha_code
+#
+# Represent alpha as an integer, so it can be compared after being read back from the CSV file, and used in a spawn_key.
+# Different values of alpha may give the same m, so alpha is needed as well as m to identify a task.
+
+def get_alpha_code(alpha):
+    return round(float(alpha) * 10**6)
+
+# get_key
+#
+# Identify a task by the parameters that determine its result
+
+def get_key(task):
+    return (get_alpha_code(task['alpha']),int(task['n']),int(task['m']),int(task['instance']),
+            int(task['k']),int(task['M']),task['solver'],int(task['seed']))
+
+# create_tasks
+#
+# Create one task for each set of clauses
+#
+# Parameters:
+#     alphas    Values of alpha, i.e. number of clauses / number of variables
+#     sizes     Numbers of variables
+#     N         Number of sets of clauses for each alpha and n
+#     seed      Entropy for SeedSequence: each task has its own stream, determined by seed, alpha, n, m, and
+#               instance, so a task gets the same clauses whenever, and in whichever process, it is run.
+
+def create_tasks(alphas,sizes,N=100,k=3,M=100,solver='sample',seed=0):
+    return [dict(alpha=alpha,n=n,m=round(alpha*n),instance=instance,k=k,M=M,solver=solver,seed=seed)
+            for n in sizes for alpha in alphas for instance in range(N)]
+
+# run
+#
+# Generate and solve one set of clauses. The functions in rsat.py use the random module,
+# so it is seeded from the task's own stream.
+
+def run(task):
+    stream = np.random.SeedSequence(task['seed'],spawn_key=(get_alpha_code(task['alpha']),task['n'],task['m'],task['instance']))
+    random.seed(int(stream.generate_state(1,dtype=np.uint64)[0]))
+    start     = time()
+    clauses   = create_clauses(n=task['n'],m=task['m'],k=task['k'])
+    satisfied = Solvers[task['solver']](clauses=clauses,M=task['M'],n=task['n'])
+    return dict(task,satisfied=int(satisfied),seconds=time()-start)
+
+# read_results
+#
+# Read results that have been saved already
+#
+# Returns:
+#     A list of dicts, one for each line, ignoring a line that was only partly written when a sweep was interrupted
+
+def read_results(file_name):
+    if not os.path.exists(file_name): return []
+    with open(file_name,newline='') as f:
+        return [row for row in csv.DictReader(f) if row['seconds'] not in [None,'']]
+
+# sweep
+#
+# Run all tasks that are not already in the file, appending each result when it is complete.
+# All results in one file must use the same seed, otherwise a restart would mix results from two sweeps.
+
+def sweep(tasks,file_name='sweep.csv',workers=os.cpu_count()):
+    results   = read_results(file_name)
+    seeds     = set(int(result['seed']) for result in results) | set(int(task['seed']) for task in tasks)
+    if len(seeds) > 1:
+        raise ValueError(f'{file_name} contains results for seed {int(results[0]["seed"])}: '
+                         f'use the same seed, or a different output file')
+    done      = set(get_key(result) for result in results)
+    remaining = [task for task in tasks if get_key(task) not in done]
+    print (f'{len(tasks) - len(remaining)} tasks already done, {len(remaining)} to do')
+    is_new    = not os.path.exists(file_name) or os.path.getsize(file_name) == 0
+    if not is_new:
+        with open(file_name,'rb') as f:
+            f.seek(-1,os.SEEK_END)
+            complete = f.read(1) == b'\n'
+    with open(file_name,'a',newline='') as f, Pool(workers) as pool:
+        writer = csv.DictWriter(f,fieldnames=Fields)
+        if is_new:
+            writer.writeheader()
+        elif not complete:
+            f.write('\n')
+        for result in pool.imap_unordered(run,remaining):
+            writer.writerow(result)
+            f.flush()
+
+# plot_results
+#
+# Plot satisfiability against alpha for each n, from saved results
+
+def plot_results(file_name='sweep.csv',figure_name='sweep'):
+    import matplotlib.pyplot as plt
+    results = read_results(file_name)
+    totals  = {}
+    for result in results:
+        key     = (result['solver'],int(result['k']),int(result['n']),float(result['alpha']))
+        count,satisfied = totals.get(key,(0,0))
+        totals[key] = (count + 1,satisfied + int(result['satisfied']))
+    fig = plt.figure(figsize=(10,6))
+    ax  = fig.add_subplot(1,1,1)
+    for solver,k,n in sorted(set(key[:3] for key in totals)):
+        alphas = sorted(alpha for (s,kk,nn,alpha) in totals if (s,kk,nn) == (solver,k,n))
+        ax.plot(alphas,[totals[(solver,k,n,alpha)][1] / totals[(solver,k,n,alpha)][0] for alpha in alphas],
+                label=f'{n} ({solver})')
+    ax.set_title(f'Satisfiability of random k-SAT: {len(results)} sets of clauses')
+    ax.set_xlabel(r'$\alpha$')
+    ax.set_ylabel('Satisfiability')
+    ax.legend(title='Number of variables')
+    fig.savefig(figure_name)
+    return fig
+
+if __name__=='__main__':
+    import argparse
+    parser = argparse.ArgumentParser('Sweep over alpha and number of variables, saving results so sweep can be resumed')
+    parser.add_argument('--seed',    type=int,                            help='Seed for random number generator; if omitted, reuse seed from output, if any')
+    parser.add_argument('--dalpha',  type=float,           default=0.01,  help='Stepsize for iterating alpha')
+    parser.add_argument('--alpha',   type=float,           default=1.0,   help='Upper limit for alpha')
+    parser.add_argument('--k',       type=int,             default=3,     help='Number of terms in each clause: default to 3-SAT')
+    parser.add_argument('--N',       type=int,             default=100,   help='Number of sets of clauses for each alpha and n')
+    parser.add_argument('--M',       type=int,             default=100,   help='Number of attempts to solve for each set')
+    parser.add_argument('--n',       type=int, nargs='*',  default=[100], help='Number of variables')
+    parser.add_argument('--solver',  choices=Solvers.keys(), default='sample', help='Method used to solve each set of clauses')
+    parser.add_argument('--workers', type=int,             default=os.cpu_count(), help='Number of processes')
+    parser.add_argument('--output',                        default='sweep.csv', help='File for results')
+    parser.add_argument('--plot',    action='store_true',  default=False, help='Plot saved results without running any tasks')
+    parser.add_argument('--show',    action='store_true',  default=False, help='Show plot')
+    args = parser.parse_args()
+
+    if not args.plot:
+        seed = args.seed
+        if seed == None:
+            previous = read_results(args.output)
+            seed     = int(previous[0]['seed']) if len(previous) > 0 else np.random.SeedSequence().entropy
+        alphas = [round(args.dalpha*i,10) for i in range(int(args.alpha/args.dalpha))]
+        start  = time()
+        sweep(create_tasks(alphas,args.n,N=args.N,k=args.k,M=args.M,solver=args.solver,seed=seed),
+              file_name=args.output,workers=args.workers)
+        print (f'Elapsed Time {time() - start:.2f} s')
+
+    plot_results(args.output,figure_name=f'{args.k}-SAT-sweep')
+    if args.show:
+        import matplotlib.pyplot as plt
+        plt.show()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Verify that a projection P coarse-grains rule f to rule g, i.e. Pf = gP, by evolving
+    both rules on a large periodic lattice, with 64 cells packed into each word.
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+
+ONE = np.uint64(1)
+TOP = np.uint64(63)
+EVEN = np.uint64(0x5555555555555555)
+
+def pack(cells):
+    '''
+    Pack cells into words, so cell j is bit j%64 of word j//64
+
+    Parameters:
+        cells     An array of 0s and 1s, whose length is a multiple of 64
+    '''
+    return np.packbits(np.asarray(cells,dtype=np.uint8),bitorder='little').view('<u8').astype(np.uint64)
+
+def unpack(words):
+    '''
+    Convert packed words back to an array of cells
+    '''
+    return np.unpackbits(words.astype('<u8').view(np.uint8),bitorder='little')
+
+def count_bits(words):
+    '''
+    Count the cells that are set to 1
+    '''
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+def step(words,rule):
+    '''
+    Apply an elementary rule once to a periodic lattice
+
+    Parameters:
+        words   Packed cells
+        rule    Wolfram rule number
+
+    Returns:
+        Packed cells after one step
+    '''
+    left = (words << ONE) | (np.roll(words,1) >> TOP)
+    right = (words >> ONE) | (np.roll(words,-1) << TOP)
+    result = np.zeros_like(words)
+    for neighbourhood in range(8):
+        if (rule >> neighbourhood) & 1:
+            result |= ((left if neighbourhood & 4 else ~left) &
+                       (words if neighbourhood & 2 else ~words) &
+                       (right if neighbourhood & 1 else ~right))
+    return result
+
+def compact(words):
+    '''
+    Extract the even numbered bits from each word, and pack them into the low 32 bits
+    '''
+    x = words & EVEN
+    for shift,mask in [(1,0x3333333333333333),
+                       (2,0x0F0F0F0F0F0F0F0F),
+                       (4,0x00FF00FF00FF00FF),
+                       (8,0x0000FFFF0000FFFF),
+                       (16,0x00000000FFFFFFFF)]:
+        x = (x | (x >> np.uint64(shift))) & np.uint64(mask)
+    return x
+
+def project(words,P):
+    '''
+    Replace each pair of cells by a single cell, using a projection
+
+    Parameters:
+        words   Packed cells; the number of words must be even
+        P       Projection number, as in ca.Projection.get_number, so the projection of
+                a pair (a,b) is bit 3-(2a+b) of P
+
+    Returns:
+        Packed cells of the coarse-grained lattice, which has half as many words
+    '''
+    a = words
+    b = words >> ONE
+    projected = np.zeros_like(words)
+    for pair in range(4):
+        if (P >> (3 - pair)) & 1:
+            projected |= (a if pair & 2 else ~a) & (b if pair & 1 else ~b)
+    halves = compact(projected)
+    return halves[0::2] | (halves[1::2] << np.uint64(32))
+
+def verify(f,g,P,cells,T):
+    '''
+    Evolve f for 2T steps, and g for T steps starting from projected cells, and compare
+
+    Parameters:
+        f       Rule for fine-grained lattice
+        g       Rule for coarse-grained lattice
+        P       Projection number
+        cells   Initial state of fine-grained lattice, packed; the number of words must be even
+        T       Number of steps for coarse-grained lattice
+
+    Returns:
+        The number of cells at which projected evolution of f differs from evolution of g, for each step,
+        and the (step, position) of the first difference, or None if they agree throughout
+    '''
+    fine = cells
+    coarse = project(cells,P)
+    mismatches = np.zeros(T,dtype=int)
+    first = None
+    for t in range(T):
+        fine = step(step(fine,f),f)
+        coarse = step(coarse,g)
+        differences = project(fine,P) ^ coarse
+        mismatches[t] = count_bits(differences)
+        if first == None and mismatches[t] > 0:
+            word = np.flatnonzero(differences)[0]
+            first = (t+1,64*int(word) + np.flatnonzero(unpack(differences[word:word+1]))[0])
+    return mismatches,first
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--f', default=105,type=int, help = 'Rule for fine-grained lattice')
+    parser.add_argument('--g', default=150,type=int, help = 'Rule for coarse-grained lattice')
+    parser.add_argument('--P', default=6,type=int, help = 'Projection, numbered as in ca.py, e.g. 6 for [0, 1, 1, 0]')
+    parser.add_argument('--L', default=2**20,type=int, help = 'Number of cells in fine-grained lattice: will be rounded up to a multiple of 128')
+    parser.add_argument('--T', default=100,type=int, help = 'Number of steps for coarse-grained lattice')
+    parser.add_argument('--trials', default=10,type=int, help = 'Number of random initial states')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    L = 128 * ((args.L + 127) // 128)
+    for trial in range(args.trials):
+        mismatches,first = verify(args.f,args.g,args.P,pack(rng.integers(2,size=L)),args.T)
+        if first == None:
+            print (f'Trial {trial}: projection of rule {args.f} agrees with rule {args.g} for {args.T} steps')
+        else:
+            print (f'Trial {trial}: first difference at step {first[0]}, cell {first[1]}; '
+                   f'{mismatches[-1]/(L//2):.4f} of cells differ after {args.T} steps')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Real space renormalization of Ising snapshots by blocking spins, either by majority rule
+    or by decimation, estimating the nearest neighbour coupling at each level. Snapshots
+    are processed one at a time, so a stack larger than memory can be read through np.load(mmap_mode='r').
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+from ising import Metropolis, get_neighbour_sum
+
+def decimate(s,b=2,rng=None):
+    '''
+    Keep one spin from each b x b block: this is a strided view, not a copy. The
+    parameter rng is not used, and is present for compatibility with block_majority.
+    '''
+    return s[::b,::b]
+
+def block_majority(s,b=2,rng=None):
+    '''
+    Replace each b x b block by the sign of its total spin
+
+    Parameters:
+        s      Square lattice of spins, whose size is a multiple of b
+        b      Size of block
+        rng    Used to break ties when b is even; if None, a tie is resolved by the spin at the top left of the block
+    '''
+    L = s.shape[0] // b
+    totals = s.reshape(L,b,L,b).sum(axis=(1,3),dtype=np.int32)
+    tie_breaker = s[::b,::b] if rng == None else rng.choice(np.array([-1,1],dtype=s.dtype),size=(L,L))
+    return np.where(totals == 0,tie_breaker,np.sign(totals)).astype(s.dtype)
+
+Blockings = {
+    'majority'   : block_majority,
+    'decimation' : decimate
+}
+
+class CouplingEstimator:
+    '''
+    Estimate nearest neighbour coupling K by maximizing pseudo-likelihood. For the Ising model
+    with no field, P(s_i | neighbours) = exp(K s_i h_i) / (2 cosh(K h_i)), where h_i is the sum
+    of the 4 neighbours, so the sufficient statistics are the number of spins with each value
+    of h, and the total of s_i for each h. These are accumulated one snapshot at a time.
+
+    Attributes:
+        counts    Number of spins for each h in -4, -2, 0, 2, 4
+        totals    Total of s_i for each h
+        spins     Number of spins seen
+        m         Total magnetization
+    '''
+    def __init__(self):
+        self.counts = np.zeros(5,dtype=np.int64)
+        self.totals = np.zeros(5,dtype=np.int64)
+        self.spins = 0
+        self.m = 0
+
+    def add(self,s):
+        '''
+        Accumulate statistics from one snapshot
+        '''
+        h = (get_neighbour_sum(s.astype(np.int8)) + 4) // 2
+        self.counts += np.bincount(h.ravel(),minlength=5)
+        self.totals += np.bincount(h.ravel(),weights=s.ravel(),minlength=5).astype(np.int64)
+        self.spins += s.size
+        self.m += int(s.sum(dtype=np.int64))
+
+    def get_coupling(self,atol=1e-10,max_iter=100):
+        '''
+        Solve sum_h h S_h = sum_h n_h h tanh(K h) for K, using Newton's method
+
+        Returns:
+            K, or np.inf if no spin is anti-aligned with the sum of its neighbours (e.g. an ordered
+            lattice), since the pseudo-likelihood then increases without limit; similarly -np.inf
+            if no spin is aligned. If every spin has h=0 there is no information about K, and 0 is returned.
+        '''
+        h = np.arange(-4,5,2)
+        target = np.sum(h * self.totals)
+        bound = np.sum(np.abs(h) * self.counts)
+        if bound == 0: return 0.0
+        if target >= bound: return np.inf
+        if target <= -bound: return -np.inf
+        K = 0.0
+        for _ in range(max_iter):
+            t = np.tanh(K * h)
+            residual = np.sum(self.counts * h * t) - target
+            step = residual / np.sum(self.counts * h**2 * (1 - t**2))
+            K -= step
+            if abs(step) < atol: break
+        return K
+
+    def get_magnetization(self):
+        return self.m / self.spins
+
+def check_size(s,m):
+    '''
+    Verify that a snapshot is square, and that its size is a multiple of m, so it can be blocked repeatedly
+    '''
+    if len(s.shape) != 2 or s.shape[0] != s.shape[1]:
+        raise ValueError(f'Snapshot must be a square lattice, not {s.shape}')
+    if s.shape[0] % m != 0:
+        raise ValueError(f'Size of lattice, {s.shape[0]}, must be divisible by b**levels = {m}')
+
+def renormalize(snapshots,levels=3,b=2,blocking='majority',rng=None):
+    '''
+    Block each snapshot repeatedly, accumulating estimates of the coupling at each level
+
+    Parameters:
+        snapshots   An iterable of square lattices of spins, whose size is divisible by b**levels,
+                    e.g. a generator, or an array loaded with mmap_mode='r'
+        levels      Number of times to apply blocking
+        b           Size of block
+        blocking    Key for Blockings
+        rng         Used by majority rule to break ties
+
+    Returns:
+        A list of CouplingEstimators, one for the original lattice, and one for each level
+    '''
+    block = Blockings[blocking]
+    estimators = [CouplingEstimator() for _ in range(levels+1)]
+    for s in snapshots:
+        check_size(s,b**levels)
+        for level,estimator in enumerate(estimators):
+            if level > 0:
+                s = block(s,b=b,rng=rng)
+            estimator.add(s)
+    return estimators
+
+def generate_snapshots(L=64,beta=0.44,n=100,burn=200,interval=10,seed=None):
+    '''
+    Generate snapshots from Metropolis simulation of Ising model. Each snapshot is a copy, since the
+    lattice is updated in place, so snapshots can be kept, e.g. np.save(file,np.stack(list(generate_snapshots())))
+    '''
+    rng = np.random.default_rng(seed)
+    s = rng.choice(np.array([-1,1],dtype=np.int8),size=(L,L))
+    updater = Metropolis(L,beta,rng)
+    for _ in range(burn):
+        updater.sweep(s)
+    for _ in range(n):
+        for _ in range(interval):
+            updater.sweep(s)
+        yield s.copy()
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--input', default=None, help = 'A .npy file containing a stack of snapshots; if omitted, snapshots are generated')
+    parser.add_argument('--blocking', default='majority', choices=Blockings.keys(), help = 'How to block spins')
+    parser.add_argument('--b', default=2,type=int, help = 'Size of block')
+    parser.add_argument('--levels', default=3,type=int, help = 'Number of times to apply blocking')
+    parser.add_argument('--L', default=64,type=int, help = 'Size of lattice for generated snapshots')
+    parser.add_argument('--beta', default=0.44,type=float, help = 'Inverse temperature for generated snapshots')
+    parser.add_argument('--n', default=100,type=int, help = 'Number of generated snapshots')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    snapshots = (np.load(args.input,mmap_mode='r') if args.input != None
+                 else generate_snapshots(L=args.L,beta=args.beta,n=args.n,seed=args.seed))
+    for level,estimator in enumerate(renormalize(snapshots,levels=args.levels,b=args.b,blocking=args.blocking,rng=rng)):
+        print (f'Level {level}: K={estimator.get_coupling():.6f}, M={estimator.get_magnetization():.6f}, spins={estimator.spins}')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
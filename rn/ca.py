@@ -20,7 +20,21 @@
 '''
 
 from argparse import ArgumentParser
+from multiprocessing import Pool
 from time import time
+import numpy as np
+from cache import Cache
+
+def to_binary(n,N=4):
+    '''
+    Convert a number to a list of N bits, most significant first
+    '''
+    result = []
+    m = n
+    for i in range(N):
+        m,r = divmod(m,2)
+        result.append(r)
+    return result[::-1]
 
 class Rule:
     '''
@@ -58,6 +72,19 @@ class Rule:
             supercell.append(self[State(bits=triplet)])
         return supercell
 
+    def evolve(self,superstate,steps):
+        '''
+        Apply rule repeatedly to superstate, which shrinks by one cell at each end for each step
+
+        Parameters:
+            superstate   A state whose length exceeds 2*steps
+            steps        Number of times rule is to be applied
+        '''
+        cells = superstate[:]
+        for _ in range(steps):
+            cells = [self[State(bits=cells[i:i+3])] for i in range(len(cells)-2)]
+        return cells
+
 class State:
     def __init__(self,n=None,bits=None,N=3):
         '''
@@ -99,37 +126,112 @@ class Projection:
     Project a state using a function defined by a table.
 
     Parameters:
-        state an array represening pairs of states
-        table A four element of a list containing projection of (0,0), (0,1), etnc
+        state an array represening blocks of N cells
+        table A list of 2**N elements containing projection of (0,0), (0,1), etnc
     '''
     def __init__(self,table=[0,1,1,0]):
         self.table = table
+        self.N = len(table).bit_length() - 1
 
     def __str__(self):
         return str(self.table)
 
     def __getitem__(self,key):
-        if len(key) % 2 != 0: raise ValueError('key should have even length')
-        return [self.table[2*key[i]+key[i+1]] for i in range(0,len(key),2)]
+        if len(key) % self.N != 0: raise ValueError(f'key should have length divisible by {self.N}')
+        return [self.table[State(bits=key[i:i+self.N]).n] for i in range(0,len(key),self.N)]
+
+    def get_number(self):
+        '''
+        The number whose binary expansion is the table, e.g. 6 for [0,1,1,0]
+        '''
+        n = 0
+        for bit in self.table:
+            n *= 2
+            n += bit
+        return n
+
+class Symmetry:
+    '''
+    One of the four symmetries of the elementary rules, generated by left-right reflection
+    and interchanging 0 and 1. If Pf = gP, the same holds after applying a symmetry to f, g, and P.
+
+    Attributes:
+        reflect      Indicates whether left and right are to be swapped
+        complement   Indicates whether 0 and 1 are to be swapped
+    '''
+    def __init__(self,reflect=False,complement=False):
+        self.reflect = reflect
+        self.complement = complement
+
+    def __str__(self):
+        return f'reflect={self.reflect},complement={self.complement}'
+
+    def apply_rule(self,n):
+        '''
+        Apply symmetry to the rule whose Wolfram number is n
+        '''
+        bits = Rule(n).bits
+        if self.reflect:
+            bits = [bits[State(bits=State(n=i).bits[::-1]).n] for i in range(8)]
+        if self.complement:
+            bits = [1 - bit for bit in bits[::-1]]
+        return sum(bit << i for i,bit in enumerate(bits))
+
+    def apply_projection(self,P):
+        '''
+        Apply symmetry to projection, i.e. reflect or complement the supercell as well as the output
+        '''
+        table = P.table
+        if self.reflect:
+            table = [table[State(bits=State(n=i,N=P.N).bits[::-1]).n] for i in range(len(table))]
+        if self.complement:
+            table = [1 - bit for bit in table[::-1]]
+        return Projection(table)
+
+    def expand(self,matches):
+        '''
+        Apply symmetry to the matches for some rule f, giving the matches for the image of f
+
+        Parameters:
+            matches    A list of tuples (g,projections), as returned by Matcher.find_matches
+
+        Returns:
+            A list of tuples (g,projections), sorted in the same order as Matcher.find_matches
+        '''
+        return sorted([(self.apply_rule(n),
+                        sorted([self.apply_projection(P) for P in projections],key=lambda P:P.get_number()))
+                       for n,projections in matches],
+                      key=lambda match:match[0])
+
+Symmetries = [Symmetry(reflect=reflect,complement=complement) for reflect in [False,True] for complement in [False,True]]
+
+def get_representative(n):
+    '''
+    Find the representative of a rule's class under Symmetries
+
+    Parameters:
+        n     Rule number
+
+    Returns:
+        The lowest numbered rule in the class, and the symmetry that maps it to n
+    '''
+    return min([(S.apply_rule(n),S) for S in Symmetries],key=lambda x:x[0])
 
 class Matcher:
     '''
     A class that, given a rule f, tries to tries to find a rule g
     and projection P such that Pf = gP
     '''
-    def __init__(self):
-        def to_binary(n,N=4):
-            result = []
-            m = n
-            for i in range(N):
-                m,r = divmod(m,2)
-                result.append(r)
-            return result[::-1]
-
+    def __init__(self,N=2):
+        '''
+        Parameters:
+            N     Number of cells in supercell
+        '''
+        self.N = N
         self.Rules = [Rule(i) for i in range(256)]
         self.Projections = []
-        for i in range(1,15):
-            self.Projections.append(Projection(to_binary(i)))
+        for i in range(1,2**(2**N)-1):
+            self.Projections.append(Projection(to_binary(i,N=2**N)))
 
     def find_matches(self,m):
         matches = []
@@ -142,18 +244,17 @@ class Matcher:
 
     def match(self,m,n):
         matches = []
-        f = matcher.Rules[m]
-        g = matcher.Rules[n]
-        for P in matcher.Projections:
+        f = self.Rules[m]
+        g = self.Rules[n]
+        for P in self.Projections:
             if self.match1(f,g,P):
                 matches.append(P)
         return matches
 
     def match1(self,f,g,P,verbose=False):
-        for i in range(2 ** 6):
-            state = State(n=i,N=6)
-            ss = str(state)
-            f1 = f.two_step(state)
+        for i in range(2 ** (3*self.N)):
+            state = State(n=i,N=3*self.N)
+            f1 = f.evolve(state,self.N)
             Pf = P[f1][0]
             g1 = State(bits=P[state])
             gp = g[g1]
@@ -162,11 +263,221 @@ class Matcher:
                 return False
         return True
 
+class TableMatcher(Matcher):
+    '''
+    A Matcher that precomputes everything it needs as tables indexed by superstate.
+
+    Each rule's two step map is stored as a 64 entry table whose values, 0-3,
+    encode the pair of cells produced from a six cell superstate. For every
+    projection P, Pf and gP are then packed into a 64 bit mask, one bit per superstate,
+    so Pf = gP reduces to comparing two integers. Rule, State, and Projection
+    remain available as the reference implementation used by Matcher.
+    '''
+    def __init__(self,N=2):
+        if N != 2: raise ValueError(f'{type(self).__name__} only supports supercells with 2 cells')
+        super().__init__()
+        superstates = np.arange(2**6)
+        cells = (superstates[:,None] >> np.arange(5,-1,-1)) & 1
+        rules = (np.arange(256)[:,None] >> np.arange(8)) & 1
+        projections = (np.arange(1,15)[:,None] >> np.arange(3,-1,-1)) & 1
+
+        step1 = rules[:,4*cells[:,:-2] + 2*cells[:,1:-1] + cells[:,2:]]
+        step2 = rules[np.arange(256)[:,None,None], 4*step1[:,:,:-2] + 2*step1[:,:,1:-1] + step1[:,:,2:]]
+        self.two_step = 2*step2[:,:,0] + step2[:,:,1]
+
+        pairs = 2*cells[:,0::2] + cells[:,1::2]
+        projected = projections[:,pairs]
+        self.triplets = 4*projected[:,:,0] + 2*projected[:,:,1] + projected[:,:,2]
+
+        self.projected = projections[np.arange(14)[None,:,None],self.two_step[:,None,:]]
+        self.Pf = self.pack(self.projected)
+        self.gP = self.pack(rules[:,self.triplets])
+
+    @staticmethod
+    def pack(bits):
+        '''
+        Pack the last axis of an array of bits, which has length 64, into one uint64 per entry
+        '''
+        return np.bitwise_or.reduce(bits.astype(np.uint64) << np.arange(64,dtype=np.uint64),axis=-1)
+
+    def match_all(self):
+        '''
+        Establish which (f,g,P) satisfy Pf = gP
+
+        Returns:
+            A boolean array indexed by f, g, and the index of P in self.Projections
+        '''
+        return self.Pf[:,None,:] == self.gP[None,:,:]
+
+    def find_matches(self,m):
+        hits = self.Pf[m][None,:] == self.gP
+        hits[m,:] = False
+        return [(int(n),[self.Projections[i] for i in np.flatnonzero(hits[n])])
+                for n in np.flatnonzero(hits.any(axis=1))]
+
+    def match(self,m,n):
+        return [self.Projections[i] for i in np.flatnonzero(self.Pf[m] == self.gP[n])]
+
+class SolvingMatcher(TableMatcher):
+    '''
+    A Matcher that derives g from f and P instead of trying every candidate.
+
+    Pf = gP requires g(P(superstate)) to be Pf(superstate) for each of the 64 superstates,
+    so a single pass over the superstates either determines g's output for every projected
+    triplet, or finds a triplet that would need to map to both 0 and 1, whence no g exists.
+    '''
+    def __init__(self,N=2):
+        super().__init__(N)
+        self.occurrences = (self.triplets[:,:,None] == np.arange(8)).astype(int)
+        self.reached = self.occurrences.sum(axis=1)
+
+    def derive(self,m):
+        '''
+        Derive g for each projection
+
+        Parameters:
+            m      A rule number, or an array of rule numbers
+
+        Returns:
+            g          Rule number of g for each projection, or -1 if there is no g such that Pf = gP
+            conflicts  A boolean array, indexed by projection and triplet, showing which
+                       triplets of P(superstate) would have to map to both 0 and 1
+        '''
+        ones = np.einsum('...pi,pit->...pt',self.projected[m],self.occurrences)
+        conflicts = (ones > 0) & (ones < self.reached)
+        # Every projection in self.Projections is onto, so each triplet is reached and g is fully determined
+        g = ((ones > 0) << np.arange(8)).sum(axis=-1)
+        return np.where(conflicts.any(axis=-1),-1,g),conflicts
+
+    def find_matches(self,m):
+        g,_ = self.derive(m)
+        return [(int(n),[self.Projections[i] for i in np.flatnonzero(g == n)])
+                for n in np.unique(g[(g >= 0) & (g != m)])]
+
+    def match(self,m,n):
+        g,_ = self.derive(m)
+        return [self.Projections[i] for i in np.flatnonzero(g == n)]
+
+class BacktrackingMatcher:
+    '''
+    A Matcher for supercells of N cells, which builds up each projection P one entry at a time.
+
+    Each superstate constrains g, once P is known for its three blocks, and for the block that f
+    produces from it after N steps. After assigning P for one more block, the constraints that have
+    just become complete are propagated, either extending the table for g, or contradicting it,
+    in which case the partial projection is abandoned. Only projections with P(0)=0 are searched,
+    as 1-P matches f to the complement of g whenever P matches f to g.
+    '''
+    def __init__(self,N=2):
+        '''
+        Parameters:
+            N     Number of cells in supercell
+        '''
+        self.N = N
+        superstates = np.arange(2**(3*N))
+        self.cells = (superstates[:,None] >> np.arange(3*N-1,-1,-1)) & 1
+        self.weights = 1 << np.arange(N-1,-1,-1)
+        self.blocks = (self.cells.reshape(-1,3,N) * self.weights).sum(axis=-1)
+        self.rules = (np.arange(256)[:,None] >> np.arange(8)) & 1
+        self.complement = Symmetry(complement=True)
+
+    def evolve(self,m):
+        '''
+        Apply rule N times to every superstate
+
+        Parameters:
+            m      Rule number
+
+        Returns:
+            The block produced from each superstate, as a number
+        '''
+        cells = self.cells
+        for _ in range(self.N):
+            cells = self.rules[m][4*cells[:,:-2] + 2*cells[:,1:-1] + cells[:,2:]]
+        return (cells * self.weights).sum(axis=-1)
+
+    def get_constraints(self,m):
+        '''
+        Establish which blocks each superstate depends on
+
+        Parameters:
+            m      Rule number
+
+        Returns:
+            A list, indexed by block, of arrays whose rows are the distinct combinations
+            (left block, centre block, right block, image of superstate under f) for which
+            that block is the highest numbered
+        '''
+        constraints = np.unique(np.column_stack([self.blocks,self.evolve(m)]),axis=0)
+        levels = constraints.max(axis=1)
+        return [constraints[levels == k] for k in range(2**self.N)]
+
+    def solve(self,m):
+        '''
+        Find all P and g such that Pf = gP
+
+        Parameters:
+            m      Rule number
+
+        Returns:
+            A list of tuples (g,table), where table represents P
+        '''
+        constraints = self.get_constraints(m)
+        P = np.zeros(2**self.N,dtype=int)
+        solutions = []
+
+        def extend(k,g):
+            '''
+            Try both values for P[k], given a partial table for g (-1 for entries not yet determined)
+            '''
+            for value in ([0] if k == 0 else [0,1]):
+                P[k] = value
+                c = constraints[k]
+                triplets = 4*P[c[:,0]] + 2*P[c[:,1]] + P[c[:,2]]
+                counts = np.bincount(triplets,minlength=8)
+                ones = np.bincount(triplets,weights=P[c[:,3]],minlength=8)
+                if ((ones > 0) & (ones < counts)).any(): continue
+                implied = np.where(counts > 0,(ones > 0).astype(int),-1)
+                if ((implied >= 0) & (g >= 0) & (implied != g)).any(): continue
+                g1 = np.where(implied >= 0,implied,g)
+                if k < len(P) - 1:
+                    extend(k+1,g1)
+                elif P.any():
+                    # P is onto, so every entry in g has been determined
+                    solutions.append((int((g1 << np.arange(8)).sum()),P.tolist()))
+
+        extend(0,np.full(8,-1))
+        return solutions + [(self.complement.apply_rule(n),[1 - bit for bit in table]) for n,table in solutions]
+
+    def find_matches(self,m):
+        matches = {}
+        for n,table in self.solve(m):
+            if n != m:
+                matches.setdefault(n,[]).append(Projection(table))
+        return [(n,sorted(matches[n],key=lambda P:P.get_number())) for n in sorted(matches)]
+
+    def match(self,m,n):
+        return sorted([Projection(table) for g,table in self.solve(m) if g == n],key=lambda P:P.get_number())
+
+Engines = {
+    'reference' : Matcher,
+    'table'     : TableMatcher,
+    'solver'    : SolvingMatcher,
+    'backtrack' : BacktrackingMatcher
+}
+
 def parse_args():
     parser = ArgumentParser(__doc__)
     parser.add_argument('--list', nargs='*', default=[],type=int, help = 'List of rules to be searched for')
     parser.add_argument('--first', default=None,type=int, help = 'First rule to be searched for (only if --list not specified)')
     parser.add_argument('--last',  default=None,type=int, help = 'First rule to be searched for (only if --list not specified)')
+    parser.add_argument('--engine', default='solver', choices=Engines.keys(), help = 'Algorithm used to search for matches')
+    parser.add_argument('--workers', default=1,type=int, help = 'Number of processes used to search')
+    parser.add_argument('--N', default=2,type=int, help = 'Number of cells in supercell (only backtrack and reference engines support N>2)')
+    parser.add_argument('--cache', default=None, help = 'Database used to store results, so searches can be resumed')
+    parser.add_argument('--query', default=None,type=int, help = 'List rules that are known (from --cache) to coarse-grain to this rule')
+    parser.add_argument('--symmetry', default=False, action='store_true', help = 'Search one representative of each class of equivalent rules only')
+    parser.add_argument('--check', default=False, action='store_true', help = 'Compare results written to matches.txt with a search of each rule using reference engine')
     return parser.parse_args()
 
 def sp(n,pl,s):
@@ -187,22 +498,122 @@ def create_worklist(args):
         product = range(args.first,args.last+1)
     return product
 
+def start_worker(engine,N=2):
+    '''
+    Create the matcher used by find_matches in this process
+    '''
+    global matcher
+    matcher = Engines[engine](N)
+
+def find_matches(i):
+    return i,matcher.find_matches(i)
+
+def search(worklist,engine='solver',workers=1,symmetry=False,N=2):
+    '''
+    Find matches for each rule in worklist, sharing the work between processes if requested
+
+    Parameters:
+        worklist   Rules to be searched for
+        engine     Name of algorithm used to search for matches
+        workers    Number of processes
+        symmetry   Indicates whether to search representatives of each class only, and apply
+                   symmetries to their matches to obtain the matches for the remaining rules
+        N          Number of cells in supercell
+
+    Yields:
+        Each rule, in the same order as worklist, with its matches
+    '''
+    if symmetry:
+        classes = [get_representative(i) for i in worklist]
+        representatives = list(dict.fromkeys(r for r,_ in classes))
+        known = dict(search(representatives,engine=engine,workers=workers,N=N))
+        for i,(r,S) in zip(worklist,classes):
+            yield i,S.expand(known[r])
+    elif workers > 1:
+        with Pool(workers,initializer=start_worker,initargs=(engine,N)) as pool:
+            yield from pool.imap(find_matches,worklist)
+    else:
+        start_worker(engine,N)
+        yield from map(find_matches,worklist)
+
+def search_with_cache(worklist,cache,engine='solver',workers=1,symmetry=False,N=2):
+    '''
+    Find matches for each rule in worklist, using results from cache if they
+    are present, and storing newly computed results in cache.
+
+    Parameters:
+        worklist   Rules to be searched for
+        cache      Cache containing results of earlier searches
+        engine     Name of algorithm used to search for matches
+        workers    Number of processes
+        symmetry   Indicates whether to search representatives of each class only
+        N          Number of cells in supercell
+
+    Yields:
+        Each rule, in the same order as worklist, with its matches
+    '''
+    pending = list(dict.fromkeys(i for i in worklist if not cache.has(i,N=N)))
+    computed = search(pending,engine=engine,workers=workers,symmetry=symmetry,N=N)
+    for i in worklist:
+        if i in pending and not cache.has(i,N=N):
+            _,matches = next(computed)
+            cache.put(i,[(n,[P.get_number() for P in projections]) for n,projections in matches],N=N)
+            yield i,matches
+        else:
+            yield i,[(n,[Projection(to_binary(p,N=2**N)) for p in projections]) for n,projections in cache.get(i,N=N)]
+
+def check(results,engine='reference',workers=1,N=2):
+    '''
+    Verify results of a search, e.g. one that used symmetries or a faster engine, by searching every rule again
+
+    Parameters:
+        results    List of rules with their matches, as yielded by search
+        engine     Name of algorithm used for searching every rule
+        workers    Number of processes
+        N          Number of cells in supercell
+
+    Returns:
+        A list of rules whose matches differ
+    '''
+    def numbered(matches):
+        return sorted((n,sorted(P.get_number() for P in projections)) for n,projections in matches)
+
+    expected = search([i for i,_ in results],engine=engine,workers=workers,N=N)
+    return [i for (i,matches),(_,matches_expected) in zip(results,expected)
+            if numbered(matches) != numbered(matches_expected)]
+
 if __name__=='__main__':
     start  = time()
     args = parse_args()
-    worklist = create_worklist(args)
-    matcher = Matcher()
-    with open('matches.txt','w') as matches_file,open('mismatches.txt','w') as mis_matches_file:
-        for i in worklist:
-            matches = matcher.find_matches(i)
-            if len(matches) ==0:
-                mis_matches_file.write(f'{i}\n')
-            else:
-                matches_file.write (f'{i} matches {len(matches)} other {sp(len(matches),'rules','rule')}\n')
-                for M in matches:
-                    matches_file.write( f'\tRule {M[0]} with the following projections\n')
-                    for P in M[1]:
-                        matches_file.write(f'\t\t{P}\n')
+    cache = Cache(args.cache) if args.cache != None else None
+    if args.query != None:
+        if cache == None:
+            raise ValueError('--query needs a --cache')
+        for f,projection in cache.coarse_grain_to(args.query,N=args.N):
+            print (f'{f} {Projection(to_binary(projection,N=2**args.N))}')
+    else:
+        worklist = create_worklist(args)
+        if cache == None:
+            results = search(worklist,engine=args.engine,workers=args.workers,symmetry=args.symmetry,N=args.N)
+        else:
+            results = search_with_cache(worklist,cache,engine=args.engine,workers=args.workers,symmetry=args.symmetry,N=args.N)
+        if args.check:
+            results = list(results)
+        with open('matches.txt','w') as matches_file,open('mismatches.txt','w') as mis_matches_file:
+            for i,matches in results:
+                if len(matches) ==0:
+                    mis_matches_file.write(f'{i}\n')
+                else:
+                    matches_file.write (f'{i} matches {len(matches)} other {sp(len(matches),'rules','rule')}\n')
+                    for M in matches:
+                        matches_file.write( f'\tRule {M[0]} with the following projections\n')
+                        for P in M[1]:
+                            matches_file.write(f'\t\t{P}\n')
+        if args.check:
+            errors = check(results,workers=args.workers,N=args.N)
+            print (f'Check against reference engine: {len(errors)} of {len(results)} rules differ {errors}')
+    if cache != None:
+        cache.close()
 
     elapsed = time() - start
     minutes = int(elapsed/60)
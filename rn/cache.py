@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Persistent store for the results of searching for coarse-grainings of cellular automata
+'''
+
+import sqlite3
+
+class Cache:
+    '''
+    Results of searching for a rule g and projection P such that Pf = gP, held in an SQLite database.
+
+    Each rule f is recorded as searched, together with its matches, in a single transaction, so
+    an interrupted search can be resumed from the last rule that was completed.
+
+    Attributes:
+        connection   Connection to database
+    '''
+    def __init__(self,file_name='ca.db'):
+        '''
+        Open database, creating tables if necessary
+
+        Parameters:
+            file_name   Name of database file
+        '''
+        self.connection = sqlite3.connect(file_name)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS searched (f INTEGER, N INTEGER, PRIMARY KEY (f,N))')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS matches (f INTEGER, N INTEGER, projection INTEGER, g INTEGER, '
+                                    'PRIMARY KEY (f,N,projection))')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS coarse ON matches (g,N)')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def has(self,f,N=2):
+        '''
+        Establish whether rule f has already been searched
+
+        Parameters:
+            f     Rule number
+            N     Number of cells in supercell
+        '''
+        return self.connection.execute('SELECT 1 FROM searched WHERE f=? AND N=?',(f,N)).fetchone() != None
+
+    def get(self,f,N=2):
+        '''
+        Retrieve matches for rule f
+
+        Parameters:
+            f     Rule number
+            N     Number of cells in supercell
+
+        Returns:
+            A list of tuples (g,projections), sorted by g, where projections is a sorted
+            list of the projections (numbered as in Projection.get_number) that match f to g
+        '''
+        matches = []
+        for g,projection in self.connection.execute('SELECT g,projection FROM matches WHERE f=? AND N=? ORDER BY g,projection',(f,N)):
+            if len(matches) == 0 or matches[-1][0] != g:
+                matches.append((g,[]))
+            matches[-1][1].append(projection)
+        return matches
+
+    def put(self,f,matches,N=2):
+        '''
+        Record the results of searching rule f
+
+        Parameters:
+            f         Rule number
+            matches   A list of tuples (g,projections), as returned by get
+            N         Number of cells in supercell
+        '''
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO matches (f,N,projection,g) VALUES (?,?,?,?)',
+                                        [(f,N,projection,g) for g,projections in matches for projection in projections])
+            self.connection.execute('INSERT OR REPLACE INTO searched (f,N) VALUES (?,?)',(f,N))
+
+    def coarse_grain_to(self,g,N=2):
+        '''
+        Find rules that coarse-grain to a specified rule
+
+        Parameters:
+            g     Rule number
+            N     Number of cells in supercell
+
+        Returns:
+            A list of tuples (f,projection), ordered by f and projection
+        '''
+        return self.connection.execute('SELECT f,projection FROM matches WHERE g=? AND N=? ORDER BY f,projection',(g,N)).fetchall()
@@ -21,13 +21,21 @@ Critical temperature of Ising mode: used to generate a figure in renormalization
 '''
 
 from matplotlib.pyplot import figure, show
+import warnings
 import numpy as np
 
-def S(beta):
+def S(beta,a=3/8,c=4):
     '''
-    This is the function from section 4.2 Introduction to the Ising Model
+    This is the function from section 4.2 Introduction to the Ising Model,
+    generalized to the family a log(cosh(c beta))
     '''
-    return (3/8) * np.log(np.cosh(4*beta))
+    return a * np.log(np.cosh(c*beta))
+
+def dS(beta,a=3/8,c=4):
+    '''
+    Derivative of S with respect to beta
+    '''
+    return a * c * np.tanh(c*beta)
 
 def plot_results(beta,S_beta,verbose=False):
     '''
@@ -70,7 +78,56 @@ def solve(atol = 1e-12):
 
     return (beta,S_beta)
 
+def solve_fixed_points(R,dR,lower,upper,args=(),atol=1e-12,max_iter=100):
+    '''
+    Solve R(beta)==beta for whole arrays of parameters at once, using Newton's method, safeguarded
+    by bisection: any Newton step that would leave the bracket is replaced by a bisection step.
+
+    Parameters:
+        R           Recursion map, called as R(beta,*args), which must accept arrays
+        dR          Derivative of R with respect to beta
+        lower       Lower end of bracket, or an array of them
+        upper       Upper end of bracket: R(beta)-beta must have opposite signs at lower and upper
+        args        Additional parameters for R and dR; these, lower, and upper are broadcast together
+        atol        Tolerance
+        max_iter    Maximum number of iterations; a warning is given for any elements that have not converged by then
+
+    Returns:
+        beta        Fixed points
+        eigenvalue  Derivative of R at each fixed point
+    '''
+    lower,upper,*args = np.broadcast_arrays(lower,upper,*args)
+    def F(beta):
+        return R(beta,*args) - beta
+
+    a = lower.astype(float)
+    b = upper.astype(float)
+    F_a = F(a)
+    if np.any(F_a * F(b) > 0):
+        raise ValueError('R(beta)-beta must change sign between lower and upper')
+    beta = 0.5 * (a + b)
+    converged = np.zeros(beta.shape,dtype=bool)
+    for _ in range(max_iter):
+        F_beta = F(beta)
+        same_sign = np.sign(F_beta) == np.sign(F_a)
+        a = np.where(same_sign,beta,a)
+        F_a = np.where(same_sign,F_beta,F_a)
+        b = np.where(same_sign,b,beta)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            newton = beta - F_beta / (dR(beta,*args) - 1)
+        next_beta = np.where((newton > a) & (newton < b),newton,0.5 * (a + b))
+        converged |= np.abs(next_beta - beta) <= atol
+        beta = next_beta
+        if np.all(converged): break
+
+    if not np.all(converged):
+        warnings.warn(f'{np.count_nonzero(~converged)} of {converged.size} fixed points did not converge to {atol} '
+                      f'in {max_iter} iterations, at indices {np.argwhere(~converged).tolist()[:10]}')
+    return beta,dR(beta,*args)
+
 if __name__=='__main__':
     beta,S_beta = solve()
+    _,eigenvalue = solve_fixed_points(S,dS,0.1,1)
+    print (f'Critical point {beta:.12f}, eigenvalue {eigenvalue:.6f}')
     plot_results(beta,S_beta)
     show()
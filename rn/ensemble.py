@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Statistics for all 256 elementary rules, evolved together from an ensemble of random initial states:
+    density, spatial block entropy, Langton's lambda, transient length, and period.
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+
+def create_rules():
+    '''
+    Create a table whose rows are the outputs of each rule, indexed by neighbourhood
+    '''
+    return ((np.arange(256)[:,None] >> np.arange(8)) & 1).astype(np.uint8)
+
+def get_lambda(rules):
+    '''
+    Langton's lambda: the fraction of neighbourhoods that map to a state other than the quiescent state, 0
+    '''
+    return rules.mean(axis=1)
+
+def step(cells,rules):
+    '''
+    Apply every rule once
+
+    Parameters:
+        cells    An array indexed by rule, member of ensemble, and cell, for a periodic lattice
+        rules    Table of rules, as created by create_rules
+    '''
+    neighbourhoods = (np.roll(cells,1,axis=-1) << 2) | (cells << 1) | np.roll(cells,-1,axis=-1)
+    return rules[np.arange(len(rules))[:,None,None],neighbourhoods]
+
+def get_keys(cells,weights):
+    '''
+    Reduce each lattice to a single number, used to detect when a state recurs. This is exact if
+    there are no more than 64 cells, and a hash otherwise.
+    '''
+    return (cells.astype(np.uint64) * weights).sum(axis=-1,dtype=np.uint64)
+
+def get_block_entropy(cells,block=3):
+    '''
+    Entropy, in bits, of the distribution of blocks of adjacent cells, pooled over the ensemble
+
+    Parameters:
+        cells    An array indexed by rule, member of ensemble, and cell
+        block    Number of cells in each block
+
+    Returns:
+        Entropy for each rule
+    '''
+    codes = sum(np.roll(cells,-j,axis=-1).astype(np.int64) << j for j in range(block))
+    n_rules = cells.shape[0]
+    counts = np.bincount((np.arange(n_rules)[:,None,None] << block | codes).ravel(),
+                         minlength=n_rules << block).reshape(n_rules,-1)
+    p = counts / counts.sum(axis=1,keepdims=True)
+    return -np.sum(p * np.log2(np.where(p > 0,p,1)),axis=1)
+
+def get_transients(history):
+    '''
+    Find the first state that recurs for each rule and member of ensemble
+
+    Parameters:
+        history   Keys for each time, rule, and member of ensemble
+
+    Returns:
+        transient   Time at which the first recurring state first occurred, or -1 if no state recurs
+        period      Time before that state recurs, or -1
+    '''
+    T1,n_rules,E = history.shape
+    keys = history.reshape(T1,-1).T
+    order = np.argsort(keys,axis=1,kind='stable')
+    sorted_keys = np.take_along_axis(keys,order,axis=1)
+    repeated = sorted_keys[:,1:] == sorted_keys[:,:-1]
+    recurrence = np.where(repeated,order[:,1:],T1)
+    j = np.argmin(recurrence,axis=1)
+    rows = np.arange(len(keys))
+    found = recurrence[rows,j] < T1
+    transient = np.where(found,order[rows,j],-1)
+    period = np.where(found,recurrence[rows,j] - transient,-1)
+    return transient.reshape(n_rules,E),period.reshape(n_rules,E)
+
+def run(E=64,L=64,T=256,block=3,rng=None):
+    '''
+    Evolve all rules from the same ensemble of random initial states
+
+    Parameters:
+        E        Number of members of ensemble
+        L        Number of cells in lattice
+        T        Number of steps
+        block    Number of cells in each block for block entropy
+        rng      Random number generator
+
+    Returns:
+        A dict of columns, each indexed by rule
+    '''
+    if rng == None:
+        rng = np.random.default_rng()
+    rules = create_rules()
+    weights = (np.uint64(1) << np.arange(L,dtype=np.uint64) if L <= 64
+               else rng.integers(2**63,size=L,dtype=np.uint64) | np.uint64(1))
+    cells = np.broadcast_to(rng.integers(2,size=(E,L),dtype=np.uint8),(len(rules),E,L))
+    density = np.empty((len(rules),T+1))
+    history = np.empty((T+1,len(rules),E),dtype=np.uint64)
+    for t in range(T+1):
+        if t > 0:
+            cells = step(cells,rules)
+        density[:,t] = cells.mean(axis=(1,2))
+        history[t] = get_keys(cells,weights)
+    transient,period = get_transients(history)
+    resolved = transient >= 0
+    n_resolved = np.maximum(resolved.sum(axis=1),1)
+    return {
+        'rule'           : np.arange(len(rules)),
+        'lambda'         : get_lambda(rules),
+        'density'        : density,
+        'final_density'  : density[:,-1],
+        'block_entropy'  : get_block_entropy(cells,block=block),
+        'resolved'       : resolved.mean(axis=1),
+        'transient'      : np.where(resolved,transient,0).sum(axis=1) / n_resolved,
+        'max_transient'  : transient.max(axis=1),
+        'period'         : np.where(resolved,period,0).sum(axis=1) / n_resolved
+    }
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--E', default=64,type=int, help = 'Number of members of ensemble')
+    parser.add_argument('--L', default=64,type=int, help = 'Number of cells in lattice (recurrence is detected exactly up to 64)')
+    parser.add_argument('--T', default=256,type=int, help = 'Number of steps')
+    parser.add_argument('--block', default=3,type=int, help = 'Number of cells in each block for block entropy')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    parser.add_argument('--output', default='ensemble.npz', help = 'File for results')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    columns = run(E=args.E,L=args.L,T=args.T,block=args.block,rng=np.random.default_rng(args.seed))
+    np.savez_compressed(args.output,**columns)
+    print (f'Saved statistics for {len(columns["rule"])} rules in {args.output}')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
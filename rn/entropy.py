@@ -15,7 +15,14 @@
 # You should have received a copy of the GNU General Public License
 # along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
 
-import math
+'''
+    Entropy of letters in Pride & Prejudice, after coarse graining; block entropies H_n of long
+    symbol sequences, and the entropy rate extrapolated from them.
+'''
+
+from argparse import ArgumentParser
+import math, warnings
+import numpy as np
 
 pp = {
     'a': 0.0777093, 'b': 0.01694125, 'c': 0.02509587, 'd': 0.0415729,
@@ -48,8 +55,335 @@ def restrict(ps,selector=lambda l: True):
     p_subset = sum(ps[k] for k in subset_keys)
     return {k:ps[k]/p_subset for k in subset_keys}
 
+# Multiplier for hashing blocks that are too long to be encoded exactly (Knuth)
+Multiplier = np.uint64(0x9E3779B97F4A7C15)
+
+def encode(text):
+    '''
+    Convert text, bytes, or an array of bytes (e.g. from np.memmap) to integer codes,
+    numbering the distinct bytes 0,1,..., so fewer bits are needed to encode each block
+
+    Returns:
+        codes, and size of alphabet
+    '''
+    if isinstance(text,str):
+        text = text.encode('utf-8')
+    data = np.frombuffer(text,dtype=np.uint8)
+    present = np.bincount(data,minlength=256) > 0
+    table = (np.cumsum(present) - 1).astype(np.uint8)
+    return table[data],int(present.sum())
+
+def get_entropy_from_counts(counts):
+    '''
+    Entropy in bits of the distribution given by an array of counts
+    '''
+    counts = counts[counts > 0]
+    total = counts.sum()
+    return math.log2(total) - np.sum(counts * np.log2(counts)) / total
+
+def get_block_entropies(codes,k,q,buckets=None,chunk_size=2**22):
+    '''
+    Calculate block entropies H_1,...,H_k. A block of n symbols is encoded as an integer,
+    sum codes[i+j]*q**(n-1-j), calculated from the code for n-1 symbols by one multiply and add;
+    if this could overflow, the code becomes a hash, modulo 2**64, instead.
+
+    Parameters:
+        codes        Sequence of integers in range(q), e.g. from encode(...); may be an np.memmap
+        k            Largest block length
+        q            Size of alphabet
+        buckets      If None, count distinct blocks by sorting them, which needs memory proportional to len(codes);
+                     otherwise, hash each block to one of this many buckets, and process codes in chunks, so memory
+                     is bounded. Blocks that share a bucket are merged, so H_n may be underestimated once the
+                     number of distinct blocks is comparable with the number of buckets.
+        chunk_size   Number of blocks processed at once when buckets is specified
+
+    Returns:
+        Array of entropies in bits, H[n-1] being the entropy of blocks of length n
+    '''
+    exact = [n * math.log2(max(q,2)) < 63 for n in range(1,k+1)]
+    if buckets == None:
+        return np.array([get_entropy_from_counts(np.unique(block,return_counts=True)[1])
+                         for block in generate_block_codes(np.asarray(codes),k,q,exact)])
+
+    counts = np.zeros((k,buckets),dtype=np.int64)
+    L = len(codes)
+    for start in range(0,L,chunk_size):
+        chunk = np.asarray(codes[start:min(start + chunk_size + k - 1,L)])
+        for n,block in enumerate(generate_block_codes(chunk,k,q,exact),start=1):
+            block = block[:chunk_size]  # blocks starting in the next chunk are counted there
+            counts[n-1] += np.bincount((block.view(np.uint64) * Multiplier >> np.uint64(32)) % np.uint64(buckets),
+                                       minlength=buckets)
+    return np.array([get_entropy_from_counts(c) for c in counts])
+
+def generate_block_codes(codes,k,q,exact):
+    '''
+    Generate codes for blocks of length 1,...,k: the code for block of length n starting at i
+    is calculated from the code for length n-1 starting at i, and the symbol at i+n-1
+    '''
+    block = codes.astype(np.int64)
+    yield block
+    for n in range(2,k+1):
+        L = len(codes) - n + 1
+        if exact[n-1]:
+            block = block[:L] * q + codes[n-1:]
+        else:
+            block = (block[:L].view(np.uint64) * Multiplier + codes[n-1:].astype(np.uint64) + np.uint64(1)).view(np.int64)
+        yield block
+
+def get_usable(H,L,margin=6):
+    '''
+    Number of block lengths whose entropies can be trusted. If there are L symbols, there are L-n+1 blocks of
+    length n, so H_n can never exceed log2(L-n+1), and is underestimated well before it gets there, because most
+    blocks have been seen only once; so only accept H_n while it is at least margin bits below this limit, i.e.
+    while a typical block has been seen about 2**margin times.
+
+    Parameters:
+        H        Block entropies H_1,...,H_k
+        L        Number of symbols in sequence, or, if blocks were hashed into buckets, the number of buckets if smaller
+        margin   Required distance in bits below log2 of the number of blocks
+    '''
+    n = np.arange(1,len(H)+1)
+    acceptable = np.asarray(H) <= np.log2(np.maximum(L - n + 1,1)) - margin
+    return len(H) if acceptable.all() else int(np.argmin(acceptable))
+
+def get_entropy_rate(H,fit=3,L=None,margin=6,min_fraction=0.25):
+    '''
+    Estimate entropy rate from block entropies
+
+    Parameters:
+        H              Block entropies H_1,...,H_k
+        fit            Number of conditional entropies used for extrapolation
+        L              Number of symbols (see get_usable); if specified, block lengths that are undersampled are not used
+        margin         Passed to get_usable
+        min_fraction   If the extrapolated rate is less than this fraction of the last usable h_n, h_n is still
+                       falling steeply, so it has not reached the regime where it decreases as c/n
+
+    Returns:
+        h      Conditional entropies h_n = H_n - H_(n-1)
+        rate   Entropy rate extrapolated to n = infinity by fitting h_n = rate + c/n to the last few usable h_n.
+               The rate lies between 0 and the last usable h_n, since h_n decreases towards it; if there are
+               fewer than two usable h_n, or the extrapolation is not credible (see min_fraction), the last
+               usable h_n is returned as an upper bound, with a warning.
+    '''
+    h = np.diff(H,prepend=0)
+    n = np.arange(1,len(H)+1)
+    usable = len(H) if L == None else get_usable(H,L,margin=margin)
+    if usable < 2:
+        warnings.warn(f'Only {usable} block length(s) sampled well enough to estimate entropy rate: use a longer sequence')
+        return h,max(h[max(usable,1)-1],0.0)
+    fit = min(fit,usable)
+    _,rate = np.polyfit(1/n[usable-fit:usable],h[usable-fit:usable],1)
+    if rate < min_fraction * h[usable-1]:
+        warnings.warn(f'h_n does not yet decrease as c/n, so extrapolation failed: entropy rate is at most {h[usable-1]:.6f}')
+        return h,h[usable-1]
+    return h,min(rate,h[usable-1])
+
+def get_entropy_terms(s):
+    '''
+    Contributions -s*log2(s) to entropy, for an array of probabilities, with 0 log 0 = 0
+    '''
+    with np.errstate(divide='ignore',invalid='ignore'):
+        return np.where(s > 0,-s * np.log2(s),0.0)
+
+def get_stirling(n,k):
+    '''
+    Stirling number of the second kind: number of partitions of n items into exactly k non-empty groups
+    '''
+    S = [1] + [0] * k
+    for i in range(1,n+1):
+        for j in range(min(i,k),0,-1):
+            S[j] = j * S[j] + S[j-1]
+        S[0] = 0
+    return S[k]
+
+class PartitionSearch:
+    '''
+    Search for the partition of an alphabet into k groups that retains the most entropy when letters are
+    replaced by their groups, i.e. loses the least information. A partition is represented by a label
+    for each letter; the canonical form numbers the groups in order of their first letter, so
+    partitions that differ only by renaming groups are recognized as the same.
+
+    Attributes:
+        letters   Letters of alphabet, sorted
+        p         Probabilities of letters
+        k         Number of groups
+        memo      Entropy for each canonical partition that has been evaluated
+        visited   Canonical partitions already reached by improve; since improve is deterministic, a restart
+                  that reaches one of these would only retrace an earlier path, so it is abandoned
+    '''
+    def __init__(self,ps,k):
+        self.letters = sorted(ps.keys())
+        self.p = np.array([ps[letter] for letter in self.letters])
+        self.p /= self.p.sum()
+        self.k = k
+        self.memo = {}
+        self.visited = set()
+
+    def get_canonical(self,labels):
+        renumber = {}
+        return tuple(renumber.setdefault(label,len(renumber)) for label in labels.tolist())
+
+    def get_entropy(self,labels):
+        '''
+        Entropy of the coarse grained distribution, memoized
+        '''
+        key = self.get_canonical(labels)
+        if key not in self.memo:
+            self.memo[key] = get_entropy_terms(np.bincount(labels,weights=self.p,minlength=self.k)).sum()
+        return self.memo[key]
+
+    def get_information_loss(self,labels):
+        return get_entropy_terms(self.p).sum() - self.get_entropy(labels)
+
+    def get_partition(self,labels):
+        '''
+        Convert labels to a list of groups, each a string of letters
+        '''
+        return [''.join(letter for letter,label in zip(self.letters,labels) if label == g) for g in range(self.k)]
+
+    def improve(self,labels):
+        '''
+        Move one letter at a time to another group, choosing the move that increases entropy the most,
+        until no move increases it. Only the two groups affected by a move change, so the change in
+        entropy is calculated for all possible moves at once from the sums for each group.
+
+        Returns:
+            Labels for a partition that is a local maximum, or None if a partition was reached that
+            had already been visited, so the local maximum has already been found
+        '''
+        labels = np.array(labels)
+        sums = np.bincount(labels,weights=self.p,minlength=self.k)
+        sizes = np.bincount(labels,minlength=self.k)
+        letters = np.arange(len(labels))
+        while True:
+            key = self.get_canonical(labels)
+            if key in self.visited: return None
+            self.visited.add(key)
+            leave = get_entropy_terms(sums[labels] - self.p) - get_entropy_terms(sums[labels])
+            join = get_entropy_terms(sums[None,:] + self.p[:,None]) - get_entropy_terms(sums[None,:])
+            gain = leave[:,None] + join
+            gain[letters,labels] = -np.inf
+            gain[sizes[labels] == 1,:] = -np.inf     # Don't leave a group empty
+            i,g = np.unravel_index(np.argmax(gain),gain.shape)
+            if gain[i,g] <= 1e-12: return labels
+            sums[labels[i]] -= self.p[i]
+            sizes[labels[i]] -= 1
+            sums[g] += self.p[i]
+            sizes[g] += 1
+            labels[i] = g
+
+    def search_local(self,restarts=100,rng=None):
+        '''
+        Improve random partitions, and keep the best
+
+        Returns:
+            Entropy, and labels, of best partition found
+        '''
+        rng = np.random.default_rng() if rng == None else rng
+        best,best_labels = -np.inf,None
+        n = len(self.letters)
+        for _ in range(restarts):
+            labels = np.concatenate([np.arange(self.k),rng.integers(self.k,size=n - self.k)])
+            labels = self.improve(rng.permutation(labels))
+            if labels is None: continue
+            entropy = self.get_entropy(labels)
+            if entropy > best:
+                best,best_labels = entropy,labels
+        return best,best_labels
+
+    def get_bound(self,sums,remaining):
+        '''
+        Upper bound for the entropy of any partition that extends a partial one. Entropy is concave, so it is
+        greatest if the probability of the remaining letters could be divided freely, and were used to raise
+        the smallest groups to a common level t, where the total raised equals remaining.
+        '''
+        s = np.sort(sums)
+        cumulative = np.cumsum(s)
+        for j in range(self.k,0,-1):
+            t = (remaining + cumulative[j-1]) / j
+            if t >= s[j-1]: break
+        return get_entropy_terms(np.maximum(sums,t)).sum()
+
+    def search_exhaustive(self,max_partitions=10**8):
+        '''
+        Examine every partition into exactly k groups, each generated once, in canonical form,
+        by assigning letters in turn either to a group already used, or to the next new group.
+        Letters are assigned in order of decreasing probability, and a branch is abandoned if the bound
+        from get_bound shows that it cannot improve on the best partition so far.
+
+        The bound is only effective if no partial partition can be nearly balanced. For 26 letters, k=2
+        (3.3e7 partitions) takes a few seconds, but for k=3 (4.2e11) local search already finds
+        entropy within 1e-7 of log2(3), so almost nothing is pruned, and the search would not finish.
+
+        Parameters:
+            max_partitions   Refuse to search if there are more partitions than this
+
+        Returns:
+            Entropy, and labels, of best partition
+        '''
+        n = len(self.letters)
+        if get_stirling(n,self.k) > max_partitions:
+            raise ValueError(f'{get_stirling(n,self.k):.2e} partitions of {n} letters into {self.k} groups: '
+                             f'too many for exhaustive search; use local search instead')
+        order = np.argsort(-self.p,kind='stable')
+        p = self.p[order]
+        remaining = np.concatenate([np.cumsum(p[::-1])[::-1],[0]])
+        labels = np.zeros(n,dtype=int)
+        sums = np.zeros(self.k)
+        best,best_labels = -np.inf,None
+
+        def assign(i,used):
+            nonlocal best,best_labels
+            if i == n:
+                entropy = get_entropy_terms(sums).sum()
+                if used == self.k and entropy > best:
+                    best,best_labels = entropy,labels.copy()
+                return
+            if n - i < self.k - used: return
+            if self.get_bound(sums,remaining[i]) <= best + 1e-12: return
+            for g in range(min(used + 1,self.k)):
+                labels[order[i]] = g
+                sums[g] += p[i]
+                assign(i + 1,max(used,g + 1))
+                sums[g] -= p[i]
+
+        assign(0,0)
+        return best,best_labels
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--text', default=None, help = 'Calculate block entropies for this file')
+    parser.add_argument('--k', default=8,type=int, help = 'Largest block length')
+    parser.add_argument('--buckets', default=None,type=int, help = 'Number of buckets for hashing blocks; if omitted, count exactly')
+    parser.add_argument('--fit', default=3,type=int, help = 'Number of conditional entropies used to extrapolate entropy rate')
+    parser.add_argument('--groups', default=None,type=int, help = 'Search for best partition of alphabet into this many groups')
+    parser.add_argument('--restarts', default=100,type=int, help = 'Number of random starting points for local search')
+    parser.add_argument('--exhaustive', default=False, action='store_true',
+                        help = 'Examine every partition, instead of using local search: only feasible for small numbers of partitions, e.g. 26 letters into 2 groups')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    return parser.parse_args()
+
 if __name__=='__main__':
-    print (get_entropy(pp))
-    print (get_entropy(coarse_grain(pp,coarsen=vowel)))
-    #print (get_entropy(restrict(pp,selector=vowel)))
-    #print (get_entropy(restrict(pp,selector=lambda l: not vowel(l))))
+    args = parse_args()
+    if args.text != None:
+        text = np.memmap(args.text,dtype=np.uint8,mode='r')
+        codes,q = (text,256) if args.buckets != None else encode(text)
+        H = get_block_entropies(codes,args.k,q,buckets=args.buckets)
+        L = len(codes) if args.buckets == None else min(len(codes),args.buckets)
+        h,rate = get_entropy_rate(H,fit=args.fit,L=L)
+        usable = get_usable(H,L)
+        for n in range(args.k):
+            print (f'{n+1:3d}{H[n]:12.6f}{h[n]:12.6f}{"" if n < usable else "  undersampled"}')
+        print (f'Entropy rate {rate:.6f} bits/symbol')
+    elif args.groups != None:
+        searcher = PartitionSearch(pp,args.groups)
+        entropy,labels = (searcher.search_exhaustive() if args.exhaustive
+                          else searcher.search_local(restarts=args.restarts,rng=np.random.default_rng(args.seed)))
+        print (f'{searcher.get_partition(labels)}: entropy {entropy:.6f}, information lost {searcher.get_information_loss(labels):.6f}')
+        if not args.exhaustive:
+            print (f'Found {len(searcher.memo)} distinct local maxima')
+    else:
+        print (get_entropy(pp))
+        print (get_entropy(coarse_grain(pp,coarsen=vowel)))
+        #print (get_entropy(restrict(pp,selector=vowel)))
+        #print (get_entropy(restrict(pp,selector=lambda l: not vowel(l))))
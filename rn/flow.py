@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Renormalization flow over the elementary rules: a directed graph with an edge f->g,
+    labelled by projection and supercell size, whenever Pf = gP. Find fixed points,
+    cycles, and the rules reachable from a given rule.
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+from ca import BacktrackingMatcher, Projection, to_binary
+
+class FlowGraph:
+    '''
+    Edges of renormalization flow, sorted by source, with indptr giving the
+    range of edges for each source, as for a CSR matrix.
+
+    Attributes:
+        source       Rule f for each edge
+        target       Rule g for each edge
+        projection   Projection P for each edge, numbered as in Projection.get_number
+        N            Number of cells in supercell for each edge
+        indptr       Edges from rule f are indptr[f]:indptr[f+1]
+    '''
+    def __init__(self,source,target,projection,N):
+        order = np.lexsort((projection,N,target,source))
+        self.source = source[order]
+        self.target = target[order]
+        self.projection = projection[order]
+        self.N = N[order]
+        self.indptr = np.searchsorted(self.source,np.arange(257))
+
+    @classmethod
+    def build(cls,sizes=[2]):
+        '''
+        Find all edges, including those from a rule to itself
+
+        Parameters:
+            sizes   Numbers of cells in supercell
+        '''
+        edges = []
+        for N in sizes:
+            matcher = BacktrackingMatcher(N)
+            for f in range(256):
+                edges.extend((f,g,Projection(table).get_number(),N) for g,table in matcher.solve(f))
+        source,target,projection,N = np.array(edges,dtype=np.int64).reshape(-1,4).T
+        return cls(source,target,projection,N)
+
+    @classmethod
+    def load(cls,file_name='flow.npz'):
+        with np.load(file_name) as data:
+            return cls(data['source'],data['target'],data['projection'],data['N'])
+
+    def save(self,file_name='flow.npz'):
+        np.savez_compressed(file_name,source=self.source,target=self.target,projection=self.projection,N=self.N)
+
+    def restrict(self,sizes):
+        '''
+        Create a graph containing only those edges whose supercells have one of the specified sizes
+        '''
+        selected = np.isin(self.N,sizes)
+        return FlowGraph(self.source[selected],self.target[selected],self.projection[selected],self.N[selected])
+
+    def get_successors(self,f):
+        '''
+        Rules g that f coarse-grains to, without duplicates
+        '''
+        return np.unique(self.target[self.indptr[f]:self.indptr[f+1]])
+
+    def get_fixed_points(self):
+        '''
+        Find rules that coarse-grain to themselves
+
+        Returns:
+            A list of tuples (f,N,projection)
+        '''
+        loops = np.flatnonzero(self.source == self.target)
+        return [(int(self.source[i]),int(self.N[i]),int(self.projection[i])) for i in loops]
+
+    def get_reachable(self,f):
+        '''
+        Find all rules reachable from f by repeated coarse-graining, excluding f unless it is on a cycle
+        '''
+        reached = np.zeros(256,dtype=bool)
+        frontier = self.get_successors(f)
+        while len(frontier) > 0:
+            reached[frontier] = True
+            frontier = np.setdiff1d(np.concatenate([self.get_successors(g) for g in frontier]),np.flatnonzero(reached))
+        return np.flatnonzero(reached)
+
+    def get_cycles(self):
+        '''
+        Find strongly connected components with more than one rule, using an iterative version of Tarjan's algorithm
+
+        Returns:
+            A list of components, each a sorted list of rules
+        '''
+        index = np.full(256,-1)
+        lowlink = np.zeros(256,dtype=int)
+        on_stack = np.zeros(256,dtype=bool)
+        stack = []
+        components = []
+        counter = 0
+        for root in range(256):
+            if index[root] >= 0: continue
+            work = [(root,iter(self.get_successors(root)))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while len(work) > 0:
+                v,successors = work[-1]
+                for w in successors:
+                    if index[w] < 0:
+                        index[w] = lowlink[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w,iter(self.get_successors(w))))
+                        break
+                    elif on_stack[w]:
+                        lowlink[v] = min(lowlink[v],index[w])
+                else:
+                    work.pop()
+                    if len(work) > 0:
+                        u,_ = work[-1]
+                        lowlink[u] = min(lowlink[u],lowlink[v])
+                    if lowlink[v] == index[v]:
+                        component = []
+                        while True:
+                            w = stack.pop()
+                            on_stack[w] = False
+                            component.append(int(w))
+                            if w == v: break
+                        if len(component) > 1:
+                            components.append(sorted(component))
+        return components
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--graph', default='flow.npz', help = 'File containing graph')
+    parser.add_argument('--build', default=False, action='store_true', help = 'Build graph and save it, instead of loading it')
+    parser.add_argument('--N', default=[2],type=int,nargs='*', help = 'Numbers of cells in supercell')
+    parser.add_argument('--fixed', default=False, action='store_true', help = 'List rules that coarse-grain to themselves')
+    parser.add_argument('--cycles', default=False, action='store_true', help = 'List cycles of rules')
+    parser.add_argument('--reach', default=[],type=int,nargs='*', help = 'List rules reachable from these rules')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    if args.build:
+        graph = FlowGraph.build(sizes=args.N)
+        graph.save(args.graph)
+        print (f'Saved {len(graph.source)} edges in {args.graph}')
+    else:
+        graph = FlowGraph.load(args.graph).restrict(args.N)
+
+    if args.fixed:
+        for f,N,projection in graph.get_fixed_points():
+            print (f'{f} is a fixed point with N={N}, P={Projection(to_binary(projection,N=2**N))}')
+
+    if args.cycles:
+        for component in graph.get_cycles():
+            print (f'Cycle: {component}')
+
+    for f in args.reach:
+        print (f'Reachable from {f}: {graph.get_reachable(f).tolist()}')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
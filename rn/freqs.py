@@ -15,24 +15,114 @@
 # You should have received a copy of the GNU General Public License
 # along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
 
+'''
+    Frequencies of letters, ignoring case. Files are read in large binary chunks, and bytes
+    counted using np.bincount, so corpora much larger than memory can be processed;
+    a directory of corpora can be processed in parallel. Only ASCII letters are counted.
+'''
+
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from pathlib import Path
+from time import time
+import numpy as np
+
+# Lookup table mapping each byte to itself, except that upper case letters are mapped to lower case
+Fold = np.arange(256)
+Fold[ord('A'):ord('Z')+1] += ord('a') - ord('A')
+
+Letters = np.arange(ord('a'),ord('z')+1)
+
+def count_bytes(data):
+    '''
+    Count occurrences of each byte value
+
+    Parameters:
+        data    bytes, bytearray, memoryview, or anything else supporting the buffer protocol
+    '''
+    return np.bincount(np.frombuffer(data,dtype=np.uint8),minlength=256)
+
+def count_file(file_name,chunk_size=2**24):
+    '''
+    Count occurrences of each byte value in a file, reading one chunk at a time into the same buffer
+    '''
+    counts = np.zeros(256,dtype=np.int64)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(file_name,'rb') as file:
+        while True:
+            n = file.readinto(buffer)
+            if n == 0: break
+            counts += count_bytes(view[:n])
+    return counts
+
+def count_files(file_names,workers=1,chunk_size=2**24):
+    '''
+    Count occurrences of each byte value in a collection of files, merging the counts
+
+    Parameters:
+        file_names   Files to be processed
+        workers      Number of processes
+        chunk_size   Number of bytes to read at once
+    '''
+    counts = np.zeros(256,dtype=np.int64)
+    if workers > 1:
+        with Pool(workers) as pool:
+            for file_counts in pool.starmap(count_file,[(file_name,chunk_size) for file_name in file_names]):
+                counts += file_counts
+    else:
+        for file_name in file_names:
+            counts += count_file(file_name,chunk_size)
+    return counts
+
+def get_frequencies(counts):
+    '''
+    Convert counts of bytes to frequencies of letters
+
+    Returns:
+        A dict mapping each letter that occurs to its frequency
+    '''
+    folded = np.bincount(Fold,weights=counts,minlength=256)[Letters]
+    total = folded.sum()
+    return {chr(c):n/total for c,n in zip(Letters,folded) if n > 0}
+
 def freqs(r):
-    result={}
-    total=0
-    for c in r:
-        if c.isalpha():
-            if c.isupper():
-                c=c.lower()
-            if c in result:
-                result[c]+=1
-            else:
-                result[c]=1
-            total+=1
-    return {c:result[c]/total for c in result.keys()}
+    '''
+    Frequencies of letters in a string
+    '''
+    return get_frequencies(count_bytes(r.encode('utf-8')))
+
+def get_file_names(paths):
+    '''
+    Expand directories into the files they contain
+    '''
+    for path in map(Path,paths):
+        if path.is_dir():
+            yield from sorted(p for p in path.rglob('*') if p.is_file())
+        else:
+            yield path
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('paths', nargs='*', help = 'Files or directories; if omitted, Pride and Prejudice is downloaded')
+    parser.add_argument('--workers', default=1,type=int, help = 'Number of processes')
+    parser.add_argument('--chunk', default=2**24,type=int, help = 'Number of bytes to read at once')
+    return parser.parse_args()
 
 if __name__=='__main__':
-    import requests
-    url = 'https://www.gutenberg.org/files/1342/1342-0.txt'
-    r   = requests.get(url)
-    ps  = freqs(r.text)
+    start  = time()
+    args = parse_args()
+    if len(args.paths) > 0:
+        ps = get_frequencies(count_files(list(get_file_names(args.paths)),workers=args.workers,chunk_size=args.chunk))
+    else:
+        import requests
+        url = 'https://www.gutenberg.org/files/1342/1342-0.txt'
+        r   = requests.get(url)
+        ps  = freqs(r.text)
     for l in sorted(ps.keys()):
         print (l,ps[l])
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
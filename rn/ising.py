@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Monte Carlo simulation of the 2D Ising model, used to check the critical point from cp.py.
+    Metropolis updates are applied to each sublattice of the checkerboard in turn; alternatively
+    use Wolff cluster updates, which avoid critical slowing down.
+'''
+
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from time import time
+from matplotlib.pyplot import figure, show
+import numpy as np
+from cp import solve
+
+def get_neighbour_sum(s):
+    '''
+    Sum of the four nearest neighbours of each spin, on a periodic lattice
+    '''
+    return np.roll(s,1,axis=0) + np.roll(s,-1,axis=0) + np.roll(s,1,axis=1) + np.roll(s,-1,axis=1)
+
+def get_energy(s):
+    '''
+    Energy per spin, with J=1
+    '''
+    return -np.mean(s * (np.roll(s,1,axis=0) + np.roll(s,1,axis=1)))
+
+class Metropolis:
+    '''
+    Update all spins of one colour of the checkerboard at once, since their neighbours all have the other colour.
+    This is only true on a periodic lattice if L is even, otherwise neighbours across the boundary have the same colour.
+    '''
+    def __init__(self,L,beta,rng):
+        if L % 2 != 0:
+            raise ValueError(f'Checkerboard updates need an even lattice size, not L={L}: use algorithm="wolff" for odd L')
+        i,j = np.indices((L,L))
+        self.sublattices = [(i + j) % 2 == 0,(i + j) % 2 == 1]
+        # Probability of accepting a flip, indexed by (s*h + 4)//2, where h is the sum of neighbours
+        self.acceptance = np.minimum(1,np.exp(-2 * beta * np.arange(-4,5,2)))
+        self.rng = rng
+
+    def sweep(self,s):
+        for sublattice in self.sublattices:
+            flip = sublattice & (self.rng.random(s.shape) < self.acceptance[(s * get_neighbour_sum(s) + 4) // 2])
+            s[flip] *= -1
+
+    def end_burn_in(self):
+        '''
+        Nothing to adjust: each sweep visits every spin once
+        '''
+        pass
+
+class Wolff:
+    '''
+    Grow a cluster of like spins from a random seed, adding each bond with probability 1-exp(-2 beta),
+    then flip the cluster. The cluster is grown one layer at a time, over the whole frontier at once.
+    '''
+    def __init__(self,L,beta,rng):
+        self.L = L
+        self.p = 1 - np.exp(-2 * beta)
+        self.rng = rng
+        self.in_cluster = np.zeros(L*L,dtype=bool)
+        self.clusters = None
+        self.burn_clusters = []
+        self.burn_flipped = []
+
+    def flip_cluster(self,s):
+        '''
+        Flip one cluster
+
+        Returns:
+            Number of spins in cluster
+        '''
+        L = self.L
+        spins = s.ravel()
+        seed = self.rng.integers(L*L)
+        spin = spins[seed]
+        frontier = np.array([seed])
+        self.in_cluster[frontier] = True
+        layers = [frontier]
+        while len(frontier) > 0:
+            i,j = np.divmod(frontier,L)
+            neighbours = np.concatenate([((i + 1) % L) * L + j,
+                                         ((i - 1) % L) * L + j,
+                                         i * L + (j + 1) % L,
+                                         i * L + (j - 1) % L])
+            candidates = neighbours[(spins[neighbours] == spin) & ~self.in_cluster[neighbours]]
+            frontier = np.unique(candidates[self.rng.random(len(candidates)) < self.p])
+            self.in_cluster[frontier] = True
+            layers.append(frontier)
+        cluster = np.concatenate(layers)
+        spins[cluster] *= -1
+        self.in_cluster[cluster] = False
+        return len(cluster)
+
+    def sweep(self,s):
+        '''
+        Flip a fixed number of clusters. During burn in, clusters are flipped until L*L spins have been flipped,
+        which is used to estimate the mean size of a cluster; but stopping when a number of spins has been flipped
+        makes the state at the end depend on the sizes of the clusters, so the measurements would be biased.
+        '''
+        if self.clusters == None:
+            flipped = 0
+            clusters = 0
+            while flipped < self.L * self.L:
+                flipped += self.flip_cluster(s)
+                clusters += 1
+            self.burn_clusters.append(clusters)
+            self.burn_flipped.append(flipped)
+        else:
+            for _ in range(self.clusters):
+                self.flip_cluster(s)
+
+    def end_burn_in(self):
+        '''
+        Fix the number of clusters per sweep, so that L*L spins are flipped per sweep on average; some spins
+        will be flipped several times, and others not at all. The mean size of a cluster is taken from the second
+        half of burn in only, as the clusters grown from the random starting state are much smaller than those
+        near equilibrium.
+        '''
+        start = len(self.burn_flipped) // 2
+        flipped = sum(self.burn_flipped[start:])
+        self.clusters = max(1,round(self.L * self.L * sum(self.burn_clusters[start:]) / flipped)) if flipped > 0 else 1
+
+Algorithms = {
+    'metropolis' : Metropolis,
+    'wolff'      : Wolff
+}
+
+def simulate(L=64,beta=0.44,algorithm='metropolis',burn=200,samples=1000,interval=1,seed=None):
+    '''
+    Simulate Ising model at one temperature
+
+    Parameters:
+        L           Size of lattice
+        beta        Inverse temperature
+        algorithm   Key for Algorithms
+        burn        Number of sweeps before measurements start
+        samples     Number of measurements
+        interval    Number of sweeps between measurements
+        seed        Seed, or SeedSequence, for random number generator
+
+    Returns:
+        A dict containing L, beta, magnetization, susceptibility, Binder cumulant, and energy per spin
+    '''
+    rng = np.random.default_rng(seed)
+    s = rng.choice(np.array([-1,1],dtype=np.int8),size=(L,L))
+    updater = Algorithms[algorithm](L,beta,rng)
+    for _ in range(burn):
+        updater.sweep(s)
+    updater.end_burn_in()
+    m = np.empty(samples)
+    e = np.empty(samples)
+    for k in range(samples):
+        for _ in range(interval):
+            updater.sweep(s)
+        m[k] = abs(s.mean())
+        e[k] = get_energy(s)
+    m2 = np.mean(m**2)
+    return {
+        'L'              : L,
+        'beta'           : beta,
+        'magnetization'  : np.mean(m),
+        'susceptibility' : beta * L * L * (m2 - np.mean(m)**2),
+        'binder'         : 1 - np.mean(m**4) / (3 * m2**2),
+        'energy'         : np.mean(e)
+    }
+
+def get_exact(L=4,beta=0.44):
+    '''
+    Calculate magnetization, Binder cumulant, and energy per spin by enumerating all 2**(L*L) states of a small lattice
+
+    Returns:
+        A dict with the same keys as simulate
+    '''
+    bits = np.arange(2**(L*L),dtype=np.int64)[:,None] >> np.arange(L*L)
+    s = (2 * (bits & 1) - 1).astype(np.int8).reshape(-1,L,L)
+    e = -np.mean(s * (np.roll(s,1,axis=1) + np.roll(s,1,axis=2)),axis=(1,2))
+    m = np.abs(s.mean(axis=(1,2)))
+    weights = np.exp(-beta * L * L * (e - e.min()))
+    weights /= weights.sum()
+    m2 = np.dot(weights,m**2)
+    return {
+        'L'              : L,
+        'beta'           : beta,
+        'magnetization'  : np.dot(weights,m),
+        'susceptibility' : beta * L * L * (m2 - np.dot(weights,m)**2),
+        'binder'         : 1 - np.dot(weights,m**4) / (3 * m2**2),
+        'energy'         : np.dot(weights,e)
+    }
+
+def check(L=4,beta=0.44,samples=20000,seed=None):
+    '''
+    Compare each algorithm with exact enumeration on a small lattice
+    '''
+    exact = get_exact(L,beta)
+    print (f'{"":>12}{"M":>10}{"U":>10}{"E":>10}')
+    print (f'{"exact":>12}{exact["magnetization"]:10.4f}{exact["binder"]:10.4f}{exact["energy"]:10.4f}')
+    for algorithm in Algorithms:
+        result = simulate(L=L,beta=beta,algorithm=algorithm,samples=samples,seed=seed)
+        print (f'{algorithm:>12}{result["magnetization"]:10.4f}{result["binder"]:10.4f}{result["energy"]:10.4f}')
+
+def run(task):
+    return simulate(**task)
+
+def create_tasks(sizes,betas,algorithm='metropolis',burn=200,samples=1000,interval=1,seed=None):
+    '''
+    Create one task for each combination of lattice size and temperature, each with its own random stream
+    '''
+    streams = np.random.SeedSequence(seed).spawn(len(sizes) * len(betas))
+    return [dict(L=L,beta=beta,algorithm=algorithm,burn=burn,samples=samples,interval=interval,seed=streams[k])
+            for k,(L,beta) in enumerate((L,beta) for L in sizes for beta in betas)]
+
+def plot_results(results,beta_c):
+    '''
+    Plot Binder cumulant and susceptibility against beta, for each lattice size
+    '''
+    fig = figure(figsize=(12,6))
+    ax1 = fig.add_subplot(1,2,1)
+    ax2 = fig.add_subplot(1,2,2)
+    for L in sorted(set(result['L'] for result in results)):
+        selected = [result for result in results if result['L'] == L]
+        betas = [result['beta'] for result in selected]
+        ax1.plot(betas,[result['binder'] for result in selected],label=f'L={L}')
+        ax2.plot(betas,[result['susceptibility'] for result in selected],label=f'L={L}')
+    for ax in [ax1,ax2]:
+        ax.axvline(np.log(1 + np.sqrt(2))/2,c='k',ls='--',label='Onsager')
+        ax.axvline(beta_c,c='r',ls='-.',label='cp.py')
+        ax.set_xlabel(r'$\beta$')
+        ax.legend()
+    ax1.set_ylabel('Binder cumulant')
+    ax2.set_ylabel('Susceptibility')
+    fig.savefig('figs/ising.jpg',bbox_inches='tight')
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--L', default=[16,32],type=int,nargs='*', help = 'Sizes of lattice')
+    parser.add_argument('--beta', default=[0.35,0.55],type=float,nargs=2, help = 'Range of inverse temperatures')
+    parser.add_argument('--n', default=21,type=int, help = 'Number of temperatures')
+    parser.add_argument('--algorithm', default='metropolis', choices=Algorithms.keys(), help = 'Update algorithm')
+    parser.add_argument('--burn', default=200,type=int, help = 'Number of sweeps before measurements start')
+    parser.add_argument('--samples', default=1000,type=int, help = 'Number of measurements')
+    parser.add_argument('--interval', default=1,type=int, help = 'Number of sweeps between measurements')
+    parser.add_argument('--workers', default=1,type=int, help = 'Number of processes')
+    parser.add_argument('--seed', default=None,type=int, help = 'Seed for random number generator')
+    parser.add_argument('--show', default=False, action='store_true', help = 'Plot results')
+    parser.add_argument('--check', default=False, action='store_true', help = 'Compare algorithms with exact enumeration for L=4')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    if args.check:
+        check(seed=args.seed)
+    else:
+        tasks = create_tasks(args.L,np.linspace(args.beta[0],args.beta[1],args.n),algorithm=args.algorithm,
+                             burn=args.burn,samples=args.samples,interval=args.interval,seed=args.seed)
+        with Pool(args.workers) as pool:
+            results = pool.map(run,tasks)
+
+        print (f'{"L":>5}{"beta":>10}{"M":>10}{"chi":>12}{"U":>10}{"E":>10}')
+        for result in results:
+            print (f'{result["L"]:5d}{result["beta"]:10.4f}{result["magnetization"]:10.4f}'
+                   f'{result["susceptibility"]:12.4f}{result["binder"]:10.4f}{result["energy"]:10.4f}')
+
+        beta_c,_ = solve()
+        print (f'Critical point from cp.py {beta_c:.6f}, Onsager {np.log(1 + np.sqrt(2))/2:.6f}')
+        if args.show:
+            plot_results(results,beta_c)
+            show()
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
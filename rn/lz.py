@@ -0,0 +1,263 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Lempel-Ziv complexity, and estimates of entropy rate, for long sequences of symbols,
+    such as text, rows of a cellular automaton, or attendance at the El Farol bar.
+    LZ76 parses the sequence using the longest earlier match at each position, found from a
+    suffix array; LZ78 builds a dictionary of phrases, stored as a trie in a dict.
+    A text file is memory mapped, but LZ76 still needs about 70 bytes of working memory per symbol,
+    for a copy of the sequence, the suffix array and its inverse, and the nearest smaller values.
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+
+def get_suffix_array(data):
+    '''
+    Sort suffixes by prefix doubling: after round k, suffixes are ranked by their first 2**k symbols,
+    and each round sorts on pairs of ranks.
+
+    Parameters:
+        data    Array of symbols, as small non-negative integers
+
+    Returns:
+        Starting positions of suffixes, in lexicographic order
+    '''
+    n = len(data)
+    if n == 0: return np.zeros(0,dtype=np.int64)
+    rank = np.asarray(data,dtype=np.int64)
+    sa = np.argsort(rank,kind='stable')
+    k = 1
+    while True:
+        second = np.full(n,-1,dtype=np.int64)
+        second[:n-k] = rank[k:]
+        key = rank * (n + 1) + second + 1
+        sa = np.argsort(key,kind='stable')
+        sorted_key = key[sa]
+        new_rank = np.empty(n,dtype=np.int64)
+        new_rank[sa] = np.concatenate([[0],np.cumsum(sorted_key[1:] != sorted_key[:-1])])
+        rank = new_rank
+        if rank[sa[-1]] == n - 1 or k >= n: return sa
+        k *= 2
+
+def get_nearest_smaller(values,reverse=False):
+    '''
+    For each element find the nearest element to its left (or right, if reverse is True) that is smaller,
+    in a single pass with a stack: the stack holds the indices of the elements seen so far that are smaller
+    than everything after them, so each index is pushed and popped at most once.
+
+    Returns:
+        Indices of nearest smaller elements, or -1 if there is none
+    '''
+    n = len(values)
+    result = np.full(n,-1,dtype=np.int64)
+    v = memoryview(np.ascontiguousarray(values,dtype=np.int64))
+    nearest = memoryview(result)
+    stack = []
+    for i in (range(n-1,-1,-1) if reverse else range(n)):
+        while len(stack) > 0 and v[stack[-1]] >= v[i]:
+            stack.pop()
+        if len(stack) > 0:
+            nearest[i] = stack[-1]
+        stack.append(i)
+    return result
+
+def get_match_length(text,i,j,block=64):
+    '''
+    Length of the longest common prefix of text[i:] and text[j:], comparing blocks of bytes first
+    '''
+    n = len(text)
+    length = 0
+    while i + length + block <= n and text[i+length:i+length+block] == text[j+length:j+length+block]:
+        length += block
+    while i + length < n and text[i+length] == text[j+length]:
+        length += 1
+    return length
+
+def get_previous_factors(data):
+    '''
+    Find, for each position i, the length of the longest prefix of data[i:] that starts earlier in data,
+    possibly overlapping i. The candidates are the suffixes starting before i that are nearest to
+    data[i:] in the suffix array, on either side (Kärkkäinen, Kempa, and Puglisi).
+
+    Parameters:
+        data    Array of bytes; this is copied, and four arrays of n int64 are built from it
+
+    Returns:
+        A function that calculates the length for a specified position
+    '''
+    text = bytes(np.asarray(data,dtype=np.uint8))
+    sa = get_suffix_array(data)
+    left = get_nearest_smaller(sa)
+    right = get_nearest_smaller(sa,reverse=True)
+    rank = np.empty_like(sa)
+    rank[sa] = np.arange(len(sa))
+
+    def get_length(i):
+        r = rank[i]
+        return max([get_match_length(text,i,int(sa[candidate])) for candidate in [left[r],right[r]] if candidate >= 0],
+                   default=0)
+
+    return get_length
+
+def lz76(data):
+    '''
+    Count components in the exhaustive history of a sequence (Lempel and Ziv, 1976): each component is the
+    longest prefix of the rest of the sequence that has occurred before, extended by one symbol.
+
+    Returns:
+        Number of components
+    '''
+    get_length = get_previous_factors(data)
+    n = len(data)
+    i = 0
+    c = 0
+    while i < n:
+        i += get_length(i) + 1
+        c += 1
+    return c
+
+def lz78(data):
+    '''
+    Parse a sequence into phrases, each being the longest phrase already in the dictionary, extended by one symbol
+    (Ziv and Lempel, 1978). The dictionary is a trie stored in a dict, with (node,symbol) as key.
+
+    Returns:
+        Number of phrases
+    '''
+    trie = {}
+    node = 0
+    for symbol in np.asarray(data).tolist():
+        child = trie.get((node,symbol))
+        if child == None:
+            trie[(node,symbol)] = len(trie) + 1
+            node = 0
+        else:
+            node = child
+    return len(trie) + (1 if node != 0 else 0)
+
+def get_entropy_rate(c,n,parser='lz76'):
+    '''
+    Estimate entropy rate, in bits per symbol, from number of components or phrases
+
+    Parameters:
+        c        Number of components (LZ76) or phrases (LZ78)
+        n        Length of sequence
+        parser   Key for Parsers
+    '''
+    if n == 0: return 0.0
+    return c * np.log2(n) / n if parser == 'lz76' else c * np.log2(c) / n
+
+Parsers = {
+    'lz76' : lz76,
+    'lz78' : lz78
+}
+
+def estimate(data,parser='lz76',window=None,step=None):
+    '''
+    Estimate complexity and entropy rate, either for the whole sequence, or for a sliding window
+
+    Parameters:
+        data      Array of symbols, which may be an np.memmap
+        parser    Key for Parsers
+        window    Length of window, or None for whole sequence
+        step      Distance between starts of successive windows (default: window)
+
+    Returns:
+        A list of tuples (start, complexity, entropy rate), one for each window
+    '''
+    n = len(data)
+    window = n if window == None else window
+    step = max(window,1) if step == None else step
+    result = []
+    for start in range(0,n - window + 1,step):
+        c = Parsers[parser](np.asarray(data[start:start+window]))
+        result.append((start,c,float(get_entropy_rate(c,window,parser=parser))))
+    return result
+
+def get_lz76_naive(data):
+    '''
+    Count LZ76 components by searching the sequence for each candidate prefix: quadratic, so only for checking lz76
+    '''
+    text = bytes(np.asarray(data,dtype=np.uint8))
+    n = len(text)
+    i = 0
+    c = 0
+    while i < n:
+        length = 0
+        while i + length < n and text.find(text[i:i+length+1],0,i+length) >= 0:
+            length += 1
+        i += length + 1
+        c += 1
+    return c
+
+def check(m=500000,trials=100,seed=None):
+    '''
+    Compare lz76 with a naive parse of short random sequences, then time it on runs of m zeros followed by
+    m ones, and vice versa, where the suffix array contains long increasing runs
+    '''
+    rng = np.random.default_rng(seed)
+    for _ in range(trials):
+        data = rng.integers(0,rng.integers(1,4,endpoint=True),size=rng.integers(0,200)).astype(np.uint8)
+        assert lz76(data) == get_lz76_naive(data), data
+    for k in range(1,20):
+        for data in [np.repeat(np.array([0,1],dtype=np.uint8),k),np.repeat(np.array([1,0],dtype=np.uint8),k)]:
+            assert lz76(data) == get_lz76_naive(data), data
+    print (f'lz76 agrees with naive parse for {trials} random sequences and for runs')
+    for first,second in [(0,1),(1,0)]:
+        data = np.repeat(np.array([first,second],dtype=np.uint8),m)
+        start = time()
+        c = lz76(data)
+        print (f'{first}^{m} {second}^{m}: {c} components, {time() - start:.2f} s')
+
+def load(file_name):
+    '''
+    Load sequence of symbols: a .npy file, such as a spacetime diagram or attendance series, is flattened
+    row by row and its values encoded as bytes; any other file is treated as bytes, and memory mapped.
+    '''
+    if file_name.endswith('.npy'):
+        values = np.load(file_name,mmap_mode='r').ravel()
+        symbols,codes = np.unique(values,return_inverse=True)
+        if len(symbols) > 256:
+            raise ValueError(f'{file_name} has {len(symbols)} distinct values: at most 256 allowed')
+        return codes.astype(np.uint8)
+    return np.memmap(file_name,dtype=np.uint8,mode='r')
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('input', nargs='?', default=None, help = 'File containing sequence: .npy, or text')
+    parser.add_argument('--parser', default='lz76', choices=Parsers.keys(), help = 'Lempel-Ziv parser')
+    parser.add_argument('--window', default=None,type=int, help = 'Length of sliding window; if omitted, use whole sequence')
+    parser.add_argument('--step', default=None,type=int, help = 'Distance between successive windows')
+    parser.add_argument('--check', default=False, action='store_true', help = 'Compare lz76 with naive parse, and time it on runs of zeros and ones')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    if args.check:
+        check()
+    else:
+        for position,c,h in estimate(load(args.input),parser=args.parser,window=args.window,step=args.step):
+            print (f'{position:10d}{c:10d}{h:12.6f}')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Renormalization flow for recursion relations with several couplings, such as the
+    Migdal-Kadanoff approximation for the Ising model in d dimensions, with coupling K and field h.
+    Evaluate the flow on a grid, find fixed points, and calculate critical exponents.
+'''
+
+from argparse import ArgumentParser
+from matplotlib.pyplot import figure, show
+import numpy as np
+
+def decimate_chain(x):
+    '''
+    Exact recursion for an Ising chain, summing over every second spin (b=2)
+
+    Parameters:
+        x     Couplings: x[0] is K, and x[1] is h; any further axes are carried through
+
+    Returns:
+        Renormalized couplings, with the same shape as x
+    '''
+    K,h = x
+    plus = np.log(np.cosh(2*K + h))
+    minus = np.log(np.cosh(2*K - h))
+    return np.stack([0.25 * (plus + minus - 2*np.log(np.cosh(h))),
+                     h + 0.5 * (plus - minus)])
+
+def create_migdal_kadanoff(d=2):
+    '''
+    Create the Migdal-Kadanoff recursion with b=2: move bonds, and fields, so the coupling and field
+    are multiplied by 2**(d-1), then decimate the resulting chains.
+
+    Parameters:
+        d     Number of dimensions
+    '''
+    def R(x):
+        return decimate_chain(2**(d-1) * np.asarray(x))
+    return R
+
+def get_flow(R,x):
+    '''
+    Evaluate the change in couplings at every point of a grid in one pass
+
+    Parameters:
+        R     Recursion map
+        x     Couplings, indexed by coupling, then by position in grid
+    '''
+    return R(x) - x
+
+def get_jacobian(R,x,eps=1e-6):
+    '''
+    Calculate Jacobian of recursion by central differences
+
+    Parameters:
+        R     Recursion map
+        x     Couplings, indexed by coupling, then any number of points
+
+    Returns:
+        Jacobians, indexed by point, then row and column
+    '''
+    n = len(x)
+    columns = []
+    for j in range(n):
+        dx = np.zeros(n)
+        dx[j] = eps
+        dx = dx.reshape((n,) + (1,) * (np.ndim(x) - 1))
+        columns.append((R(x + dx) - R(x - dx)) / (2*eps))
+    return np.moveaxis(np.stack(columns,axis=1),(0,1),(-2,-1))
+
+def find_fixed_points(R,guesses,atol=1e-10,max_iter=50,decimals=6):
+    '''
+    Solve R(x)=x by Newton's method, starting from all guesses at once
+
+    Parameters:
+        R          Recursion map
+        guesses    Starting points, indexed by coupling, then by point
+        atol       Tolerance
+        max_iter   Maximum number of iterations
+        decimals   Fixed points that agree to this many decimal places are considered the same
+
+    Returns:
+        Distinct fixed points, indexed by point, then coupling
+    '''
+    x = np.array(guesses,dtype=float)
+    n = len(x)
+    for _ in range(max_iter):
+        F = get_flow(R,x)
+        J = get_jacobian(R,x) - np.eye(n)
+        with np.errstate(all='ignore'):
+            step = np.linalg.solve(J,-F.T[...,None])[...,0].T
+        step[:,~np.all(np.isfinite(step),axis=0)] = 0
+        x = x + step
+        if np.all(np.abs(step) < atol): break
+    converged = np.all(np.isfinite(x),axis=0) & np.all(np.abs(get_flow(R,x)) < np.sqrt(atol),axis=0)
+    return np.unique(np.round(x[:,converged].T,decimals=decimals) + 0.0,axis=0)
+
+def get_exponents(R,fixed_point,b=2):
+    '''
+    Linearize recursion at fixed point
+
+    Parameters:
+        R             Recursion map
+        fixed_point   Couplings at fixed point
+        b             Rescaling factor
+
+    Returns:
+        eigenvalues   Eigenvalues of Jacobian, largest first
+        y             Exponents: eigenvalue = b**y
+    '''
+    eigenvalues = np.linalg.eigvals(get_jacobian(R,np.asarray(fixed_point,dtype=float)))
+    eigenvalues = eigenvalues[np.argsort(-np.abs(eigenvalues))]
+    with np.errstate(divide='ignore'):
+        return eigenvalues,np.log(np.abs(eigenvalues)) / np.log(b)
+
+def plot_flow(R,K,h,fixed_points,d=2):
+    '''
+    Flow diagram in the (K,h) plane
+    '''
+    grid = np.stack(np.meshgrid(K,h))
+    flow = get_flow(R,grid)
+    fig = figure(figsize=(8,8))
+    ax = fig.add_subplot(1,1,1)
+    ax.streamplot(K,h,flow[0],flow[1],density=1.5)
+    ax.scatter(fixed_points[:,0],fixed_points[:,1],c='r',zorder=3,label='Fixed points')
+    ax.set_xlabel('K')
+    ax.set_ylabel('h')
+    ax.set_xlim(K[0],K[-1])
+    ax.set_ylim(h[0],h[-1])
+    ax.set_title(f'Migdal-Kadanoff flow, d={d}')
+    ax.legend()
+    fig.savefig('figs/mk.jpg',bbox_inches='tight')
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--d', default=2,type=int, help = 'Number of dimensions')
+    parser.add_argument('--K', default=[0.05,2.0],type=float,nargs=2, help = 'Range of couplings for starting points and plot')
+    parser.add_argument('--h', default=[0.0,0.0],type=float,nargs=2, help = 'Range of fields for starting points')
+    parser.add_argument('--n', default=50,type=int, help = 'Number of starting points for each coupling')
+    parser.add_argument('--show', default=False, action='store_true', help = 'Plot flow diagram')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    args = parse_args()
+    R = create_migdal_kadanoff(d=args.d)
+    guesses = np.stack(np.meshgrid(np.linspace(*args.K,args.n),np.linspace(*args.h,args.n))).reshape(2,-1)
+    fixed_points = find_fixed_points(R,guesses)
+    print (f'{"K":>10}{"h":>10}  Eigenvalues / exponents')
+    for fixed_point in fixed_points:
+        eigenvalues,y = get_exponents(R,fixed_point)
+        print (f'{fixed_point[0]:10.6f}{fixed_point[1]:10.6f}  ' +
+               ', '.join(f'{eigenvalue.real:.6f} (y={exponent:.4f})' for eigenvalue,exponent in zip(eigenvalues,y)))
+    if args.show:
+        plot_flow(R,np.linspace(*args.K,100),np.linspace(-1,1,100),fixed_points,d=args.d)
+        show()
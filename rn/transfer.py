@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+# Copyright (C) 2025 Greenweaves Software Limited
+
+# This is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with GNU Emacs.  If not, see <http://www.gnu.org/licenses/>.
+
+'''
+    Free energy and correlation length of Ising model on a strip of width W, periodic across the strip,
+    from the leading eigenvalues of the transfer matrix, and estimates of the critical point by finite size scaling,
+    to compare with cp.py. The 2**W x 2**W matrix is never stored: it is applied as a diagonal matrix
+    for the bonds within a row, and one 2 x 2 operation on each spin for the bonds between rows.
+'''
+
+from argparse import ArgumentParser
+from time import time
+import numpy as np
+from scipy.optimize import brentq
+from scipy.sparse.linalg import LinearOperator, eigsh
+from cp import S, dS, solve_fixed_points
+
+class TransferMatrix(LinearOperator):
+    '''
+    Symmetric transfer matrix D^(1/2) V D^(1/2), where D contains the bonds within a row, and V,
+    a tensor product of W 2x2 matrices, the bonds between rows.
+    '''
+    def __init__(self,W,K):
+        '''
+        Parameters:
+            W    Width of strip
+            K    Coupling
+        '''
+        super().__init__(dtype=np.float64,shape=(2**W,2**W))
+        self.W = W
+        self.K = K
+        states = np.arange(2**W)
+        rotated = (states >> 1) | ((states & 1) << (W - 1))
+        unlike = np.zeros(2**W,dtype=int)
+        for i in range(W):
+            unlike += ((states ^ rotated) >> i) & 1
+        self.half_diagonal = np.exp(0.5 * K * (W - 2*unlike))
+
+    def _matvec(self,x):
+        v = (self.half_diagonal * np.ravel(x)).reshape((2,) * self.W)
+        for axis in range(self.W):
+            v = np.exp(self.K) * v + np.exp(-self.K) * np.flip(v,axis=axis)
+        return self.half_diagonal * v.ravel()
+
+    def get_leading_eigenvalues(self,k=2):
+        '''
+        Find largest eigenvalues using ARPACK (Lanczos)
+        '''
+        return np.sort(eigsh(self,k=k,which='LA',return_eigenvectors=False))[::-1]
+
+def analyze(W,K):
+    '''
+    Calculate free energy and correlation length for a strip
+
+    Parameters:
+        W    Width of strip
+        K    Coupling
+
+    Returns:
+        beta times free energy per site, and correlation length along strip
+    '''
+    lambda0,lambda1 = TransferMatrix(W,K).get_leading_eigenvalues()
+    return -np.log(lambda0) / W,1 / np.log(lambda0 / lambda1)
+
+def estimate_critical_point(W1,W2,lower=0.3,upper=0.6):
+    '''
+    Phenomenological renormalization: find K such that xi/W is the same for both widths
+    '''
+    return brentq(lambda K: analyze(W1,K)[1] / W1 - analyze(W2,K)[1] / W2,lower,upper)
+
+def parse_args():
+    parser = ArgumentParser(__doc__)
+    parser.add_argument('--W', default=[4,6,8,10,12],type=int,nargs='*', help = 'Widths of strips')
+    parser.add_argument('--K', default=[0.3,0.4407,0.5],type=float,nargs='*', help = 'Couplings')
+    parser.add_argument('--scaling', default=False, action='store_true',
+                        help = 'Estimate critical point from each pair of successive widths')
+    return parser.parse_args()
+
+if __name__=='__main__':
+    start  = time()
+    args = parse_args()
+    print (f'{"W":>4}{"K":>10}{"f":>14}{"xi":>14}')
+    for W in args.W:
+        for K in args.K:
+            f,xi = analyze(W,K)
+            print (f'{W:4d}{K:10.4f}{f:14.8f}{xi:14.6f}')
+
+    if args.scaling:
+        for W1,W2 in zip(args.W[:-1],args.W[1:]):
+            print (f'Critical point estimated from W={W1} and {W2}: {estimate_critical_point(W1,W2):.6f}')
+        beta_c,_ = solve_fixed_points(S,dS,0.1,1)
+        print (f'Critical point from cp.py {beta_c:.6f}, Onsager {np.log(1 + np.sqrt(2))/2:.6f}')
+
+    elapsed = time() - start
+    minutes = int(elapsed/60)
+    seconds = elapsed - 60*minutes
+    print (f'Elapsed Time {minutes} m {seconds:.2f} s')